@@ -0,0 +1,79 @@
+import re
+from typing import Literal, NamedTuple
+
+Intent = Literal["calculation", "search"]
+
+# Asking for an amount of room: "how much can I contribute", "what is my contribution room", ...
+_ROOM_REQUEST = re.compile(
+    r"""
+    \bhow\s+much\b.*\b(?:room|contribut\w*|put|deposit|invest|save)\b
+    | \b(?:calculate|compute|work\s+out|figure\s+out|estimate)\b.*\b(?:room|limit|contribut\w*)\b
+    | \b(?:what(?:'s|\s+is)|tell\s+me)\s+(?:my|the\s+total|my\s+total)\b.*\b(?:room|limit)\b
+    | \b(?:my|total|cumulative|available|unused)\s+(?:tfsa\s+)?(?:contribution\s+)?room\b
+    | \bcontribution\s+room\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# When the person became eligible: "turned 18 in 2015" or "born in 1997"
+_TURNED_18_YEAR = re.compile(r"\b(?:turned|turning|became|was)\s+(?:18|eighteen)\b\D{0,20}?\b((?:19|20)\d{2})\b", re.IGNORECASE)
+_BIRTH_YEAR = re.compile(r"\bborn\b\D{0,20}?\b((?:19|20)\d{2})\b", re.IGNORECASE)
+_ANY_YEAR = re.compile(r"\b((?:19|20)\d{2})\b")
+
+# Amounts already put in or taken out, which the year alone cannot account for
+_HISTORY = re.compile(
+    r"""
+    \b(?:contributed|deposited|invested|put\s+in|withdr[ae]w\w*|took\s+out|taken\s+out|opened)\b
+    | \$\s*\d | \b\d[\d,]*(?:\.\d+)?\s*(?:k|dollars)\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Questions about how the rules work, which need the documents and an explanation
+_EXPLANATION = re.compile(
+    r"""
+    \b(?:why|explain|how\s+(?:does|do|is|are|can)|what\s+happens|what\s+if|when\s+(?:do|does|can|is)
+    | rules?|penalt\w*|tax(?:ed|es)?|over-?contribut\w*|withdraw\w*|transfer\w*|non-?resident\w*
+    | eligib\w*|difference|compare|versus|vs\.?)\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+class Route(NamedTuple):
+    """
+    Where a question goes. `year_turned_18` is set for calculations that say
+    when the person turned 18 or was born; without it the agent asks for it. `confident` means the question asks for an amount, says when the
+    person turned 18 (or was born) and mentions no past contributions,
+    withdrawals or amounts, so the tool result alone answers it.
+    """
+    intent: Intent
+    year_turned_18: int | None = None
+    confident: bool = False
+
+
+def _year_turned_18(question: str) -> int | None:
+    """The year the person turned 18, when the question states it or their birth year."""
+    if match := _TURNED_18_YEAR.search(question):
+        return int(match.group(1))
+    if match := _BIRTH_YEAR.search(question):
+        return int(match.group(1)) + 18
+    return None
+
+
+def route_question(question: str) -> Route:
+    if not _ROOM_REQUEST.search(question):
+        return Route("search")
+
+    explanation = _EXPLANATION.search(question) is not None
+    year = _year_turned_18(question)
+    if year is None and (explanation or _ANY_YEAR.search(question)):
+        # "How are withdrawals added back to contribution room?" is about the rules, and
+        # "How much can I contribute in 2025?" about that year's limit, not about when
+        # the person turned 18
+        return Route("search")
+
+    # A contribution history still goes to the tool, but the LLM answers so it
+    # can account for what the template cannot
+    confident = year is not None and not explanation and _HISTORY.search(question) is None
+    return Route("calculation", year, confident=confident)
@@ -1,34 +1,53 @@
 import logging
 
+from app.agents.router import Route, route_question
+from app.core.metrics import timed
 from app.schemas.chat import ToolAnswer, ToolError, CalculationAnswer
 from app.tools.calculations import calculate_tfsa_contribution_room
-from app.utils.utils import extract_year
 from app.tools.retrieval import find_relevant_sections
+from app.rag.partitions import RetrievalFilter
+from app.rag.retriever import RetrievalContext
 
 logger = logging.getLogger(__name__)
 
 class TFSAAagent:
-
-    def handle_question(self, question: str) -> ToolAnswer | ToolError | None:
-        question_lower = question.lower()
+    """
+    Routes a question to a deterministic tool when one applies.
+
+    `handle_question` accepts the request's `RetrievalContext` so tools can
+    reuse the hits (or widen them with `retrieval.top(k)`) without embedding
+    the question a second time. Without a context, `filters` restricts the
+    sections it looks up.
+    """
+
+    @timed("agent")
+    def handle_question(
+        self,
+        question: str,
+        retrieval: RetrievalContext | None = None,
+        route: Route | None = None,
+        filters: RetrievalFilter | None = None,
+    ) -> ToolAnswer | ToolError | None:
+        route = route or route_question(question)
 
         # --- Tool decision ---
-        if "contribution" in question_lower:
+        if route.intent == "calculation":
             logger.info("TFSA contribution question detected. Using calculation tool.")
-            year_turned_18 = extract_year(question)
 
-            if year_turned_18 == -1:
+            if route.year_turned_18 is None:
                 return ToolError(
                     type="error", 
                     message="Please specify the year you turned 18.") 
 
-
-            calculation = calculate_tfsa_contribution_room(
-                year_turned_18=year_turned_18,
-            )
+            try:
+                calculation = calculate_tfsa_contribution_room(
+                    year_turned_18=route.year_turned_18,
+                )
+            except ValueError as e:
+                return ToolError(type="error", message=str(e))
 
             # Retrieve relevant CRA sections for explanation
-            sections = find_relevant_sections(question)
+            sections = find_relevant_sections(question, retrieval=retrieval, filters=filters)
 
             return CalculationAnswer(type="calculation_result", sections=sections, calculation=calculation) 
 
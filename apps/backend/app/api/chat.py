@@ -1,16 +1,27 @@
+import json
 import logging
+from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.auth import get_auth0, get_current_user
-from app.core.db import SessionLocal
-from app.core.setup import retriever, client
+from app.core.metrics import timed
+from app.core.db import AsyncSessionLocal, get_async_db, get_db
+from app.core.setup import aget_retriever, get_client
 from app.core.config import get_settings
 from app.models.chat import Chat
 from app.models.message import Message, MessageSenderType
 from app.models.user import User
-from app.rag.ask import ask_llm
-from app.utils.utils import format_chat_history
+from app.rag.ask import ask_llm_async, stream_llm
+from app.rag.batch import answer_questions, iter_answers
+from app.rag.history import HistoryWindow, fit_history
+from app.rag.partitions import RetrievalFilter
+from app.schemas.chat import BatchQuestionRequest
+from app.utils.utils import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +30,6 @@ router = APIRouter(tags=["chat"], prefix="/chat")
 settings = get_settings()
 auth0 = get_auth0()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/chats", description="Fetch all chat sessions")
 def get_chats(db: Session = Depends(get_db), current_user: User = Depends(get_current_user), _ = Depends(auth0.require_auth())):
     chats = db.query(Chat).where(Chat.owner_id == current_user.id).all()
@@ -44,7 +47,7 @@ def create_chat(chat_title: str, db: Session = Depends(get_db), current_user: Us
     return {"code": 201, "chat": chat}
 
 @router.delete("/{chat_id}/delete", description="Delete a chat session")
-def delete_chat(chat_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user), _ = Depends(auth0.require_auth())):
+def delete_chat(chat_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(get_current_user), _ = Depends(auth0.require_auth())):
     logger.info("Deleting chat session with id: %s", chat_id)
     chat = db.query(Chat).filter(Chat.id == chat_id).first()
     if not chat:
@@ -56,48 +59,143 @@ def delete_chat(chat_id: str, db: Session = Depends(get_db), current_user: User
     logger.info("Chat session with id %s deleted successfully.", chat_id)
     return {"code": 200, "message": "Chat deleted successfully."}
 
+@router.post(
+    "/batch",
+    description="Answer many questions at once without storing them in a chat. "
+    "With stream=true results are sent as newline-delimited JSON in question order.",
+)
+async def answer_batch(request: BatchQuestionRequest, _ = Depends(auth0.require_auth())):
+    if len(request.questions) > settings.BATCH_MAX_QUESTIONS:
+        logger.error("Batch of %d questions exceeds the limit.", len(request.questions))
+        return {"code": 413, "error": f"At most {settings.BATCH_MAX_QUESTIONS} questions per batch."}
+
+    filters = RetrievalFilter(request.document, request.jurisdiction, request.year)
+    # Clients may ask for less parallelism than the server allows, never more
+    concurrency = min(request.concurrency or settings.BATCH_CONCURRENCY, settings.BATCH_CONCURRENCY)
+    retriever = await aget_retriever()
+    if request.stream:
+        async def lines():
+            async for result in iter_answers(
+                request.questions, retriever, get_client(), settings.GEMINI_GENAI_MODEL, concurrency, filters
+            ):
+                yield json.dumps(result) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    answers = await answer_questions(
+        request.questions, retriever, get_client(), settings.GEMINI_GENAI_MODEL, concurrency, filters
+    )
+    return {"code": 200, "answers": answers}
+
 @router.get(
-    "/{chat_id}/messages", description="Retrieve messages for a specific chat session"
+    "/{chat_id}/messages",
+    description="Retrieve a page of messages for a chat session, oldest first. "
+    "Without a cursor the most recent `limit` messages are returned; pass `before_cursor` "
+    "as `before` to load older ones, or `after_cursor` as `after` to fetch messages sent since.",
 )
-def get_messages(chat_id: str, db: Session = Depends(get_db), _ = Depends(auth0.require_auth())):
+def get_messages(
+    chat_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    before: str | None = None,
+    after: str | None = None,
+    db: Session = Depends(get_db),
+    _ = Depends(auth0.require_auth()),
+):
     logger.info("Retrieving messages for chat_id: %s", chat_id)
     chat = db.query(Chat).filter(Chat.id == chat_id).first()
     if not chat:
         logger.error("Chat with id %s not found.", chat_id)
         return {"code": 404, "error": "Chat not found."}
 
-    messages = (
-        db.query(Message)
-        .filter(Message.chat_id == chat.id)
-        .order_by(Message.created_at)
-        .all()
-    )
+    if before and after:
+        return {"code": 400, "error": "Use either before or after, not both."}
+    try:
+        before_key = decode_cursor(before) if before else None
+        after_key = decode_cursor(after) if after else None
+    except ValueError:
+        logger.error("Invalid message cursor for chat_id: %s", chat_id)
+        return {"code": 400, "error": "Invalid cursor."}
 
-    return {"code": 200, "chat_id": str(chat.id), "messages": messages}
+    messages = db.execute(_messages_page(chat.id, limit + 1, before_key, after_key)).scalars().all()
+    # One extra row tells whether more remain past this page
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if not after_key:
+        messages.reverse()
+
+    return {
+        "code": 200,
+        "chat_id": str(chat.id),
+        "messages": messages,
+        "has_more": has_more,
+        "before_cursor": _cursor(messages[0]) if messages else before,
+        "after_cursor": _cursor(messages[-1]) if messages else after,
+    }
+
+
+def _messages_page(chat_id: UUID, limit: int, before=None, after=None):
+    """
+    Up to `limit` messages, read in index order over (chat_id, created_at, id).
+
+    Walks forwards from `after` when given; otherwise walks backwards from
+    `before`, or from the newest message.
+    """
+    key = tuple_(Message.created_at, Message.id)
+    query = select(Message).where(Message.chat_id == chat_id)
+
+    if after:
+        return query.where(key > after).order_by(Message.created_at, Message.id).limit(limit)
+    if before:
+        query = query.where(key < before)
+    return query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
+
+
+def _cursor(message: Message) -> str:
+    return encode_cursor(message.created_at, message.id)
 
 
 @router.post(
-    "/{chat_id}/message", description="Send a message to the chat and receive an answer"
+    "/{chat_id}/message",
+    description="Send a message to the chat and receive an answer. "
+    "With stream=true the answer is sent as Server-Sent Events while it is generated. "
+    "Optional document, jurisdiction and year restrict the sections the answer is drawn from.",
 )
-def create_message(chat_id: str, question: str, db: Session = Depends(get_db), _ = Depends(auth0.require_auth())):
+async def create_message(
+    chat_id: UUID,
+    question: str,
+    stream: bool = False,
+    document: str | None = None,
+    jurisdiction: str | None = None,
+    year: int | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    _ = Depends(auth0.require_auth()),
+):
     logger.info("Received question: %s", question)
 
     if not question.strip():
         logger.warning("Empty question received.")
         return {"answer": "Please provide a valid question."}
 
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
-    if not chat:
-        logger.error("Chat with id %s not found.", chat_id)
-        return {"code": 404, "error": "Chat not found."}
+    with timed("db"):
+        chat = (await db.execute(select(Chat).where(Chat.id == chat_id))).scalar_one_or_none()
+        if not chat:
+            logger.error("Chat with id %s not found.", chat_id)
+            return {"code": 404, "error": "Chat not found."}
 
-    message = Message(chat_id=chat.id, text=question, sent_by=MessageSenderType.USER)
-    db.add(message)
-    db.commit()
-    db.refresh(message)
+        recent_messages = await _get_recent_messages(chat, db)
+        history = fit_history(chat.history_summary or "", list(reversed(recent_messages)))
+        if history.folded:
+            chat.history_summary = history.summary
+            chat.history_summary_until = history.folded[-1].created_at
+
+        # One commit stores the question and any summary update, and returns the
+        # connection to the pool before retrieval and generation
+        db.add(Message(chat_id=chat.id, text=question, sent_by=MessageSenderType.USER))
+        await db.commit()
 
-    chunks = retriever.search(question)
-    if not chunks:
+    retriever = await aget_retriever()
+    retrieval = await retriever.aretrieve(question, filters=RetrievalFilter(document, jurisdiction, year))
+    if not retrieval.hits:
         logger.warning("No relevant CRA sections found.")
         message = Message(
             chat_id=chat.id,
@@ -105,16 +203,25 @@ def create_message(chat_id: str, question: str, db: Session = Depends(get_db), _
             sent_by=MessageSenderType.SYSTEM,
         )
         db.add(message)
-        db.commit()
-        db.refresh(message)
+        with timed("db"):
+            await db.commit()
         return {"code": 204, "message": message}
 
-    recent_messages = _get_recent_messages(chat_id, db)
-
-    chat_history = format_chat_history(recent_messages)
+    if history.tokens_saved > 0:
+        logger.info(
+            "Chat history trimmed: %d messages folded into the summary, %d tokens saved",
+            len(history.folded), history.tokens_saved,
+        )
+    if stream:
+        return StreamingResponse(
+            _stream_answer(chat.id, retrieval, question, history),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-    answer = ask_llm(
-        chunks, question, client, settings.GEMINI_GENAI_MODEL, chat_history=chat_history
+    answer = await ask_llm_async(
+        retrieval, question, get_client(), settings.GEMINI_GENAI_MODEL,
+        chat_history=history.text, history_tokens_saved=history.tokens_saved,
     )
     logger.info("Generated answer: %s", answer)
 
@@ -129,17 +236,56 @@ def create_message(chat_id: str, question: str, db: Session = Depends(get_db), _
     )
 
     db.add(message)
-    db.commit()
-    db.refresh(message)
+    with timed("db"):
+        await db.commit()
 
     return {"code": 200, "message": message}
 
 
-def _get_recent_messages(chat_id: str, db: Session, limit: int = 5):
-    return (
-        db.query(Message)
-        .filter(Message.chat_id == chat_id)
-        .order_by(Message.created_at.desc())
-        .limit(limit)
-        .all()
-    )
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _stream_answer(chat_id, retrieval, question: str, history: HistoryWindow):
+    """
+    Relay answer tokens as SSE `token` events, then persist the full text as a
+    single Message and finish with a `done` event carrying that row.
+    """
+    parts = []
+    try:
+        async for text in stream_llm(
+            retrieval, question, get_client(), settings.GEMINI_GENAI_MODEL,
+            chat_history=history.text, history_tokens_saved=history.tokens_saved,
+        ):
+            parts.append(text)
+            yield _sse("token", {"text": text})
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Streaming generation failed for chat_id: %s", chat_id)
+        yield _sse("error", {"error": "Answer generation failed."})
+        return
+
+    answer = "".join(parts)
+    logger.info("Generated answer: %s", answer)
+
+    if not answer:
+        logger.warning("No answer could be generated.")
+        answer = "No answer could be generated."
+
+    # The request's session is not guaranteed to outlive the response body
+    async with AsyncSessionLocal() as db:
+        message = Message(chat_id=chat_id, text=answer, sent_by=MessageSenderType.SYSTEM)
+        db.add(message)
+        with timed("db"):
+            await db.commit()
+
+    yield _sse("done", {"code": 200, "message": message})
+
+
+async def _get_recent_messages(chat: Chat, db: AsyncSession):
+    """Newest messages not yet folded into the chat's history summary, newest first."""
+    query = _messages_page(chat.id, settings.HISTORY_MAX_MESSAGES)
+    if chat.history_summary_until:
+        query = query.where(Message.created_at > chat.history_summary_until)
+
+    result = await db.execute(query)
+    return result.scalars().all()
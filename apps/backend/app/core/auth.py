@@ -1,19 +1,71 @@
 from __future__ import annotations
 
+import logging
+import threading
+import time
+from collections import OrderedDict
 from functools import lru_cache
 
 from fastapi import Depends
-from sqlalchemy.orm import Session
-from app.core.db import SessionLocal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.core.config import get_settings
+from app.core.db import get_db
 from app.core.setup import configure_auth0
 from app.models.user import User
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+logger = logging.getLogger(__name__)
+
+
+class KnownUsers:
+    """
+    Auth0 subjects whose `users` row is known to exist, so requests can skip
+    the lookup. Entries expire after `ttl_seconds`; the least recently seen
+    subject is evicted beyond `max_size`.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, sub: str) -> bool:
+        with self._lock:
+            seen_at = self._seen.get(sub)
+            if seen_at is None or time.monotonic() - seen_at > self.ttl_seconds:
+                self.misses += 1
+                return False
+
+            self._seen.move_to_end(sub)
+            self.hits += 1
+            return True
+
+    def add(self, sub: str) -> None:
+        with self._lock:
+            self._seen[sub] = time.monotonic()
+            self._seen.move_to_end(sub)
+            while len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._seen),
+                "max_size": self.max_size,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_known_users() -> KnownUsers:
+    settings = get_settings()
+    return KnownUsers(ttl_seconds=settings.USER_CACHE_TTL_SECONDS, max_size=settings.USER_CACHE_SIZE)
 
 
 @lru_cache(maxsize=1)
@@ -32,19 +84,36 @@ def get_current_user(
     auth_result: dict = Depends(get_auth0().require_auth()),
     db: Session = Depends(get_db),
 ):
-    print(auth_result)
     auth0_id = auth_result.get("sub")
 
-    user = db.query(User).filter(User.id == auth0_id).first()
+    known_users = get_known_users()
+    if auth0_id not in known_users:
+        _ensure_user(db, auth0_id)
+        known_users.add(auth0_id)
+
+    # Attach the row without reading it; other columns load lazily if ever used
+    user = User(id=auth0_id)
+    make_transient_to_detached(user)
+    db.add(user)
+    return user
 
-    if not user:
-        user = User(
+
+def _ensure_user(db: Session, auth0_id: str) -> None:
+    """
+    Insert the user unless it exists. Concurrent first requests for the same
+    subject both succeed; the second insert is a no-op.
+    """
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    result = db.execute(
+        insert(User)
+        .values(
             id=auth0_id,
             # email=auth_result.get("email"),
             # name=auth_result.get("name", "New User"),
         )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        .on_conflict_do_nothing(index_elements=[User.id])
+    )
+    db.commit()
 
-    return user
+    if result.rowcount:
+        logger.info("Created user %s", auth0_id)
@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from auth0_api_python.cache import CacheAdapter
+from auth0_api_python.errors import VerifyAccessTokenError
+from auth0_api_python.utils import fetch_jwks, fetch_oidc_metadata
+
+logger = logging.getLogger(__name__)
+
+# Unknown key ids trigger at most one JWKS fetch per this many seconds
+_MIN_FORCED_REFRESH_SECONDS = 60
+
+
+class JwksCache(CacheAdapter):
+    """
+    OIDC discovery metadata and JWKS kept in memory for the life of the process.
+
+    Entries never expire on read, so no request waits on Auth0. `refresh`
+    re-fetches every entry, on a timer started with `start` or when a token
+    names a key id the cached set lacks; a failed fetch keeps the last good
+    copy.
+    """
+
+    def __init__(self, custom_fetch=None):
+        self.custom_fetch = custom_fetch
+        self._entries: dict[str, Any] = {}
+        self._task: asyncio.Task | None = None
+        self.refreshes = 0
+        self.refreshed_at = float("-inf")
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        self._entries[key] = value
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def refresh(self) -> None:
+        for key, value in list(self._entries.items()):
+            try:
+                if "keys" in value:
+                    # JWKS entries are keyed by their jwks_uri
+                    self._entries[key], _ = await fetch_jwks(key, custom_fetch=self.custom_fetch)
+                elif "jwks_uri" in value:
+                    # Discovery entries are keyed by the issuer, https://<domain>/
+                    domain = key.replace("https://", "").rstrip("/")
+                    self._entries[key], _ = await fetch_oidc_metadata(domain, custom_fetch=self.custom_fetch)
+            except Exception: # pylint: disable=broad-exception-caught
+                logger.warning("Refreshing %s failed; keeping the cached copy", key, exc_info=True)
+        self.refreshes += 1
+        self.refreshed_at = time.monotonic()
+
+    def start(self, interval_seconds: float) -> None:
+        async def refresh_forever():
+            while True:
+                await asyncio.sleep(interval_seconds)
+                await self.refresh()
+
+        self._task = asyncio.create_task(refresh_forever())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class CachingApiClient:
+    """
+    Wraps the Auth0 `ApiClient` so each bearer token's signature is verified
+    once: verified claims are kept by SHA-256 of the token until its `exp`.
+
+    Routes that depend on `require_auth()` more than once (directly and via
+    `get_current_user`) then verify a token a single time per lifetime, not
+    once per dependency per request. DPoP requests carry a per-request proof
+    and always go to the wrapped client.
+    """
+
+    def __init__(self, api_client, jwks_cache: JwksCache, max_size: int = 10000):
+        self._api_client = api_client
+        self.jwks_cache = jwks_cache
+        self.max_size = max_size
+        self._claims: OrderedDict[str, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name: str):
+        return getattr(self._api_client, name)
+
+    async def verify_request(
+        self, headers: dict[str, str], http_method: Optional[str] = None, http_url: Optional[str] = None
+    ) -> dict[str, Any]:
+        lowered = {k.lower(): v for k, v in headers.items()}
+        scheme, _, token = lowered.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or "dpop" in lowered:
+            return await self._api_client.verify_request(headers, http_method=http_method, http_url=http_url)
+
+        key = hashlib.sha256(token.strip().encode("utf-8")).hexdigest()
+        claims = self._claims.get(key)
+        if claims is not None and time.time() < claims["exp"]:
+            self._claims.move_to_end(key)
+            self.hits += 1
+            return dict(claims)
+
+        self.misses += 1
+        self._claims.pop(key, None)
+        try:
+            claims = await self._api_client.verify_request(headers, http_method=http_method, http_url=http_url)
+        except VerifyAccessTokenError as e:
+            recently_refreshed = time.monotonic() - self.jwks_cache.refreshed_at < _MIN_FORCED_REFRESH_SECONDS
+            if "No matching key found in JWKS" not in str(e) or recently_refreshed:
+                raise
+            # Auth0 may have rotated its signing key since the JWKS was cached
+            await self.jwks_cache.refresh()
+            claims = await self._api_client.verify_request(headers, http_method=http_method, http_url=http_url)
+
+        self._claims[key] = claims
+        while len(self._claims) > self.max_size:
+            self._claims.popitem(last=False)
+        return dict(claims)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._claims),
+            "max_size": self.max_size,
+        }
@@ -4,12 +4,90 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     GEMINI_GENAI_MODEL: str
-    GEMINI_API_KEY: str
+    # Checked when the genai client is first created, so the app imports without it
+    GEMINI_API_KEY: str = ""
     GEMINI_EMBEDDING_MODEL: str
     DB_URL: str
     AUTH0_DOMAIN: str
     AUTH0_AUDIENCE: str
 
+    # Query-embedding cache; set EMBEDDING_CACHE_PATH to persist vectors in SQLite
+    EMBEDDING_CACHE_SIZE: int = 1024
+    EMBEDDING_CACHE_PATH: str = ""
+
+    # Semantic answer cache for paraphrased questions
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_THRESHOLD: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_SIZE: int = 1000
+
+    # Ingestion embedding: texts per request, batches in flight, 429/5xx retries
+    EMBED_BATCH_SIZE: int = 100
+    EMBED_CONCURRENCY: int = 4
+    EMBED_MAX_RETRIES: int = 6
+    EMBED_BACKOFF_SECONDS: float = 1.0
+
+    # FAISS index built by ingest: flat, ivf_flat, hnsw or ivf_pq
+    INDEX_TYPE: str = "flat"
+    INDEX_NLIST: int = 1024
+    INDEX_PQ_M: int = 64
+    INDEX_PQ_NBITS: int = 8
+    INDEX_HNSW_M: int = 32
+    INDEX_EF_CONSTRUCTION: int = 80
+    # Search-time parameters applied by the retriever
+    INDEX_NPROBE: int = 16
+    INDEX_EF_SEARCH: int = 64
+    # Memory-map the index and metadata so uvicorn workers share one copy in the page cache
+    INDEX_MMAP: bool = False
+    # Seconds between checks for a newly published index snapshot (0 disables hot-swap)
+    INDEX_RELOAD_SECONDS: int = 30
+    INDEX_SNAPSHOTS_KEEP: int = 3
+    # Write a sub-index per document/jurisdiction/year so filtered searches stay
+    # fast as partitions grow; they hold a second copy of every vector. Without
+    # them filters use an ID selector over the main index
+    INDEX_PARTITIONS: bool = False
+
+    # Hybrid retrieval: BM25 fused with vector search, and a keyword-only fast path
+    HYBRID_SEARCH_ENABLED: bool = True
+    RRF_K: int = 60
+    LEXICAL_FAST_PATH_ENABLED: bool = True
+    LEXICAL_FAST_PATH_MAX_TERMS: int = 4
+    # Answer questions that only ask for a contribution-room amount from a template, without the LLM
+    CALCULATION_FAST_PATH_ENABLED: bool = True
+
+    # Share one upstream call between identical embedding/generation calls in flight at once
+    LLM_COALESCING_ENABLED: bool = True
+
+    # POST /chat/batch: generation calls in flight and questions per request
+    BATCH_CONCURRENCY: int = 8
+    BATCH_MAX_QUESTIONS: int = 500
+
+    # Connection pool per engine (the sync and async engines each keep one); unused for SQLite
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    # Recycle connections before server or proxy idle timeouts close them
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Verified token claims kept until each token's exp, and how often the JWKS is re-fetched
+    TOKEN_CACHE_SIZE: int = 10000
+    JWKS_REFRESH_SECONDS: int = 600
+
+    # How long an authenticated user is trusted to exist without a DB lookup
+    USER_CACHE_TTL_SECONDS: int = 300
+    USER_CACHE_SIZE: int = 10000
+
+    # Prompt size limits, in estimated tokens (about 4 characters each)
+    PROMPT_TOKEN_BUDGET: int = 3000
+    # Chat history share of the prompt, including the rolling summary of older turns
+    HISTORY_TOKEN_BUDGET: int = 600
+    HISTORY_SUMMARY_TOKENS: int = 250
+    HISTORY_MAX_MESSAGES: int = 20
+
+    # Allow clients to request a Server-Timing header with X-Debug-Timing: 1
+    TIMING_HEADER_ENABLED: bool = False
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
@@ -1,13 +1,91 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import get_settings
 
+
+def _async_url(url: str):
+    """Swap the sync driver in DB_URL for its asyncio counterpart."""
+    async_url = make_url(url)
+    backend = async_url.get_backend_name()
+
+    if backend == "postgresql":
+        query = dict(async_url.query)
+        # asyncpg spells libpq's sslmode as ssl
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        async_url = async_url.set(drivername="postgresql+asyncpg", query=query)
+    elif backend == "sqlite":
+        async_url = async_url.set(drivername="sqlite+aiosqlite")
+
+    return async_url
+
+
+def _pool_options(url: str) -> dict:
+    """Pool sizing from settings. SQLite keeps SQLAlchemy's defaults for its file connections."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+
+    settings = get_settings()
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 try:
     DATABASE_URL = get_settings().DB_URL
     if not DATABASE_URL:
         raise ValueError("DB_URL environment variable is not set.")
-    engine = create_engine(DATABASE_URL, echo=False)
+    engine = create_engine(DATABASE_URL, echo=False, **_pool_options(DATABASE_URL))
     SessionLocal = sessionmaker(bind=engine)
+    async_engine = create_async_engine(_async_url(DATABASE_URL), echo=False, **_pool_options(DATABASE_URL))
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
     Base = declarative_base()
 except Exception as e:
     raise RuntimeError(f"Failed to set up database connection: {e}") from e
+
+
+def get_db():
+    """
+    Request-scoped session. FastAPI resolves a dependency once per request, so
+    the endpoint and `get_current_user` share this session and its connection.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def ensure_schema():
+    """
+    Create missing tables, then add the columns and indexes models gained
+    after an existing database was created. There are no migrations, so new
+    columns must be nullable.
+    """
+    Base.metadata.create_all(bind=engine)
+
+    existing = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            present = {column["name"] for column in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present:
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                        f"{column.type.compile(dialect=engine.dialect)}"
+                    )
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
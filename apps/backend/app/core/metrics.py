@@ -0,0 +1,198 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import get_settings
+
+# Sub-millisecond cache hits up to multi-second LLM calls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each stage of the chat pipeline",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "End-to-end request latency by route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the LLM provider",
+    ["kind"],
+)
+PROMPT_SIZE = Histogram(
+    "rag_prompt_chars",
+    "Size of prompts sent to the LLM, in characters",
+    buckets=(500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000),
+)
+TOKENS_SAVED = Counter(
+    "rag_prompt_tokens_saved_total",
+    "Estimated tokens kept out of prompts by the token budget",
+    ["part"],
+)
+COALESCED_CALLS = Counter(
+    "llm_coalesced_calls_total",
+    "Upstream LLM calls avoided by sharing an identical call already in flight",
+    ["method"],
+)
+STARTUP_DURATION = Gauge(
+    "app_startup_duration_seconds",
+    "Seconds from the start of the lifespan until each startup phase finished",
+    ["phase"],
+)
+
+# Stage timings of the current request or benchmark iteration
+_request_timings: ContextVar[dict[str, float] | None] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(stage: str):
+    """Time a block (or, as a decorator, a sync function) under `stage`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.labels(stage).observe(elapsed)
+
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+@contextmanager
+def collect_timings():
+    """Sum the stages timed inside the block into the yielded dict, by stage name."""
+    timings: dict[str, float] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def record_prompt(prompt: str) -> None:
+    PROMPT_SIZE.observe(len(prompt))
+
+
+def record_coalesced(method: str) -> None:
+    COALESCED_CALLS.labels(method).inc()
+
+
+def record_startup(phase: str, seconds: float) -> None:
+    STARTUP_DURATION.labels(phase).set(seconds)
+
+
+def record_tokens_saved(part: str, tokens: int) -> None:
+    if tokens > 0:
+        TOKENS_SAVED.labels(part).inc(tokens)
+
+
+def record_usage(response) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return
+
+    for kind, count in (
+        ("prompt", usage.prompt_token_count),
+        ("completion", usage.candidates_token_count),
+    ):
+        if count:
+            LLM_TOKENS.labels(kind).inc(count)
+
+
+class TimingMiddleware(BaseHTTPMiddleware):
+    """
+    Records request latency per route. When TIMING_HEADER_ENABLED is set and
+    the client sends `X-Debug-Timing: 1`, the response also carries a
+    `Server-Timing` header with the stages that ran before it was sent.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        wants_timing = get_settings().TIMING_HEADER_ENABLED and request.headers.get("x-debug-timing") == "1"
+
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            response = await call_next(request)
+        elapsed = time.perf_counter() - started
+
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            request.method, getattr(route, "path", "unmatched"), str(response.status_code)
+        ).observe(elapsed)
+
+        if wants_timing:
+            timings["total"] = elapsed
+            response.headers["Server-Timing"] = ", ".join(
+                f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()
+            )
+        return response
+
+
+class CacheCollector:
+    """Exposes the in-process caches' counters at scrape time."""
+
+    def describe(self):
+        # Registration would otherwise call collect(), importing the caches too early
+        return []
+
+    def collect(self):
+        # Imported lazily: the caches pull in the RAG stack
+        from app.rag.answer_cache import get_answer_cache # pylint: disable=import-outside-toplevel
+        from app.rag.embedding_cache import get_embedding_cache # pylint: disable=import-outside-toplevel
+        from app.core.auth import get_auth0, get_known_users # pylint: disable=import-outside-toplevel
+
+        caches = {
+            "embedding": get_embedding_cache().stats(),
+            "user": get_known_users().stats(),
+            "token": get_auth0().api_client.stats(),
+        }
+        answer_cache = get_answer_cache()
+        if answer_cache:
+            caches["answer"] = answer_cache.stats()
+
+        for field in ("hits", "misses", "size"):
+            family = GaugeMetricFamily(f"rag_cache_{field}", f"Cache {field} by cache", labels=["cache"])
+            for name, stats in caches.items():
+                family.add_metric([name], stats[field])
+            yield family
+
+        if answer_cache:
+            yield GaugeMetricFamily(
+                "rag_answer_cache_latency_saved_seconds",
+                "Generation time avoided by answer cache hits",
+                value=caches["answer"]["latency_saved_seconds"],
+            )
+
+
+REGISTRY.register(CacheCollector())
+
+
+def metrics_response() -> Response:
+    """Prometheus exposition of this process, or of all workers in multiprocess mode."""
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
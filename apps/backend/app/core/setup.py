@@ -1,14 +1,32 @@
+import asyncio
 import logging
 import sys
+import threading
+import time
 
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_plugin.fast_api_client import Auth0FastAPI
 
+from app.core.auth_cache import CachingApiClient, JwksCache
+from app.core.metrics import TimingMiddleware, record_startup
+from app.llm.coalesce import CoalescingClient
 from app.llm.gemini import get_gemini_client
 from app.rag.retriever import FaissRetriever
+from app.rag.snapshots import current_snapshot
 from app.core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+# The genai client and retriever are created on first use, not at import time,
+# so importing the app stays cheap and works without the index or an API key
+_resource_lock = threading.RLock()
+_client = None
+_retriever: FaissRetriever | None = None
+_load_error: str | None = None
+# Set when a retriever is installed with `set_resources`; such a retriever is never hot-swapped
+_retriever_pinned = False
+
 
 def setup_logging(level=logging.INFO):
     """
@@ -45,25 +63,151 @@ def create_app(router: APIRouter, lifespan=None) -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(TimingMiddleware)
     app.include_router(router)
     return app
 
 
-def configure_auth0():
+def configure_auth0(custom_fetch=None):
+    """
+    Auth0 verifier with JWKS held in memory and verified claims cached per
+    token. `custom_fetch` replaces HTTP calls to Auth0, e.g. to verify
+    tokens signed with local keys.
+    """
     settings = get_settings()
 
+    jwks_cache = JwksCache(custom_fetch=custom_fetch)
     auth0 = Auth0FastAPI(
         domain=settings.AUTH0_DOMAIN,
         audience=settings.AUTH0_AUDIENCE,
+        custom_fetch=custom_fetch,
+        cache_adapter=jwks_cache,
     )
+    auth0.api_client = CachingApiClient(auth0.api_client, jwks_cache, max_size=settings.TOKEN_CACHE_SIZE)
 
     return auth0
 
 
-client = get_gemini_client()
+def get_client():
+    """
+    The process's genai client, created on first use. Identical concurrent
+    embedding and generation calls share one upstream request unless
+    LLM_COALESCING_ENABLED is off.
+    """
+    global _client # pylint: disable=global-statement
+    if _client is None:
+        with _resource_lock:
+            if _client is None:
+                client = get_gemini_client()
+                _client = CoalescingClient(client) if get_settings().LLM_COALESCING_ENABLED else client
+    return _client
+
+
+def get_retriever() -> FaissRetriever:
+    """
+    The process's retriever, reading the FAISS index and metadata on first
+    use. Async code should await `aget_retriever` instead so a request that
+    arrives while the index is loading does not block the event loop.
+    """
+    global _retriever # pylint: disable=global-statement
+    if _retriever is None:
+        with _resource_lock:
+            if _retriever is None:
+                _retriever = _load_snapshot()
+    return _retriever
+
+
+def _load_snapshot() -> FaissRetriever:
+    snapshot = current_snapshot()
+    return FaissRetriever(
+        index_path=snapshot.index_path,
+        metadata_path=snapshot.metadata_path,
+        client=get_client(),
+        version=snapshot.version,
+    )
+
+
+async def aget_retriever() -> FaissRetriever:
+    if _retriever is not None:
+        return _retriever
+    return await asyncio.to_thread(get_retriever)
+
 
-retriever = FaissRetriever(
-    index_path="app/embedding/tfsa.faiss",
-    metadata_path="app/embedding/tfsa_embeddings.json",
-    client=client,
-)
+def set_resources(client=None, retriever: FaissRetriever | None = None):
+    """Replace the client and/or retriever, e.g. with a benchmark's stubs."""
+    global _client, _retriever, _retriever_pinned # pylint: disable=global-statement
+    with _resource_lock:
+        if client is not None:
+            _client = client
+        if retriever is not None:
+            _retriever = retriever
+            _retriever_pinned = True
+
+
+def reload_retriever() -> bool:
+    """
+    Swap in the published snapshot if it is newer than the one being served.
+
+    The new retriever is loaded and warmed while the old one keeps serving,
+    then replaces it in a single assignment. Requests already holding the old
+    retriever (through their `RetrievalContext`) finish on it; it is freed
+    once the last of them lets go. Returns whether a swap happened.
+    """
+    global _retriever # pylint: disable=global-statement
+    if _retriever is None or _retriever_pinned or current_snapshot().version == _retriever.version:
+        return False
+
+    started = time.perf_counter()
+    retriever = _load_snapshot()
+    retriever.warm_up()
+
+    with _resource_lock:
+        if _retriever_pinned:
+            return False
+        previous, _retriever = _retriever, retriever
+    logger.info(
+        "Swapped index snapshot %s for %s in %.2fs",
+        previous.version, retriever.version, time.perf_counter() - started,
+    )
+    return True
+
+
+async def watch_snapshots(interval_seconds: float):
+    """Check for a newly published index snapshot every `interval_seconds`, forever."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(reload_retriever)
+        except Exception: # pylint: disable=broad-exception-caught
+            logger.exception("Loading the new index snapshot failed; still serving the previous one")
+
+
+def readiness() -> dict:
+    if _retriever is not None:
+        return {"ready": True, "status": "ready"}
+    if _load_error:
+        return {"ready": False, "status": "failed", "error": _load_error}
+    return {"ready": False, "status": "loading"}
+
+
+async def load_resources(started: float):
+    """
+    Load the client and retriever off the event loop, recording how long after
+    `started` (a `time.perf_counter()` value) the app became ready. Run as a
+    background task from the lifespan so health checks answer meanwhile.
+    """
+    global _load_error # pylint: disable=global-statement
+    try:
+        load_started = time.perf_counter()
+        await aget_retriever()
+    except Exception as e: # pylint: disable=broad-exception-caught
+        # Left unset, the retriever is loaded again by the next request that needs it
+        logger.exception("Loading the retriever failed")
+        _load_error = str(e)
+        return
+
+    _load_error = None
+    finished = time.perf_counter()
+    record_startup("retriever", finished - load_started)
+    record_startup("ready", finished - started)
+    logger.info("Ready %.2fs after startup, retriever loaded in %.2fs", finished - started, finished - load_started)
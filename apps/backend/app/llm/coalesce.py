@@ -0,0 +1,164 @@
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+
+from app.core.metrics import record_coalesced
+
+
+def call_key(method: str, model: str, contents, config=None) -> tuple[str, str, str]:
+    """(method, model, hash of contents and config) identifying identical upstream calls."""
+    try:
+        payload = json.dumps([contents, config], sort_keys=True)
+    except TypeError:
+        # Content and config objects from the genai SDK have stable reprs
+        payload = repr([contents, config])
+    return method, model, hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _shared(response):
+    """The leader's response as seen by a follower: usage is reported by the leader only."""
+    if getattr(response, "usage_metadata", None) is None:
+        return response
+    if hasattr(response, "model_copy"):
+        return response.model_copy(update={"usage_metadata": None})
+    response = copy.copy(response)
+    response.usage_metadata = None
+    return response
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class _CoalescingModels:
+    """`client.models` with identical concurrent calls from threads sharing one upstream call."""
+
+    def __init__(self, models, stats: "CoalescingClient"):
+        self._models = models
+        self._stats = stats
+        self._flights: dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        return getattr(self._models, name)
+
+    def embed_content(self, model: str, contents, config=None):
+        return self._call("embed_content", model, contents, config)
+
+    def generate_content(self, model: str, contents, config=None):
+        return self._call("generate_content", model, contents, config)
+
+    def _call(self, method: str, model: str, contents, config):
+        key = call_key(method, model, contents, config)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self._stats.record_coalesced(method)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _shared(flight.result)
+
+        self._stats.record_call()
+        try:
+            flight.result = getattr(self._models, method)(model=model, contents=contents, config=config)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+class _CoalescingAsyncModels:
+    """`client.aio.models` with identical concurrent calls sharing one upstream task."""
+
+    def __init__(self, models, stats: "CoalescingClient"):
+        self._models = models
+        self._stats = stats
+        self._flights: dict[tuple, asyncio.Task] = {}
+
+    def __getattr__(self, name: str):
+        # generate_content_stream and the rest are passed through
+        return getattr(self._models, name)
+
+    async def embed_content(self, model: str, contents, config=None):
+        return await self._call("embed_content", model, contents, config)
+
+    async def generate_content(self, model: str, contents, config=None):
+        return await self._call("generate_content", model, contents, config)
+
+    async def _call(self, method: str, model: str, contents, config):
+        key = call_key(method, model, contents, config)
+        task = self._flights.get(key)
+
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self._stats.record_coalesced(method)
+            return _shared(await asyncio.shield(task))
+
+        self._stats.record_call()
+        task = asyncio.ensure_future(getattr(self._models, method)(model=model, contents=contents, config=config))
+        self._flights[key] = task
+
+        def land(_):
+            if self._flights.get(key) is task:
+                del self._flights[key]
+
+        task.add_done_callback(land)
+        # Shielded so a cancelled leader request does not cancel the call its followers wait on
+        return await asyncio.shield(task)
+
+
+class _CoalescingAio:
+    def __init__(self, aio, models: _CoalescingAsyncModels):
+        self._aio = aio
+        self.models = models
+
+    def __getattr__(self, name: str):
+        return getattr(self._aio, name)
+
+
+class CoalescingClient:
+    """
+    Wraps a genai client so concurrent identical `embed_content` and
+    `generate_content` calls (same model, contents and config) share one
+    upstream request, on the sync and async (`client.aio`) paths alike.
+
+    Only calls in flight at the same moment are shared; nothing is cached
+    once a call returns. Streaming calls are passed through unchanged.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+        self.models = _CoalescingModels(client.models, self)
+        self.aio = _CoalescingAio(client.aio, _CoalescingAsyncModels(client.aio.models, self))
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    def record_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def record_coalesced(self, method: str) -> None:
+        with self._lock:
+            self.coalesced += 1
+        record_coalesced(method)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced}
@@ -1,10 +1,16 @@
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
 
+from fastapi.responses import JSONResponse
+
 from .api import router
 from .core.auth import get_auth0
-from .core.db import Base, engine
-from .core.setup import create_app, setup_logging
+from .core.config import get_settings
+from .core.db import engine, ensure_schema
+from .core.metrics import metrics_response, record_startup
+from .core.setup import create_app, load_resources, readiness, setup_logging, watch_snapshots
 
 setup_logging(logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,12 +18,29 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app):
+    started = time.perf_counter()
     if engine.url.get_backend_name().startswith("postgres"):
         with engine.begin() as conn:
             conn.exec_driver_sql('CREATE EXTENSION IF NOT EXISTS "uuid-ossp";')
-    # Ensure required tables exist before handling requests
-    Base.metadata.create_all(bind=engine)
+    # Ensure required tables, columns and indexes exist before handling requests
+    ensure_schema()
+    record_startup("schema", time.perf_counter() - started)
+
+    settings = get_settings()
+    jwks_cache = get_auth0().api_client.jwks_cache
+    jwks_cache.start(settings.JWKS_REFRESH_SECONDS)
+
+    # The index loads in the background; GET / answers now, GET /ready once it is loaded.
+    # Snapshots published by ingest later are swapped in without a restart
+    background = [asyncio.create_task(load_resources(started))]
+    if settings.INDEX_RELOAD_SECONDS > 0:
+        background.append(asyncio.create_task(watch_snapshots(settings.INDEX_RELOAD_SECONDS)))
+    record_startup("serving", time.perf_counter() - started)
+    logger.info("Serving %.2fs after startup", time.perf_counter() - started)
     yield
+    for task in background:
+        task.cancel()
+    await jwks_cache.stop()
 
 
 app = create_app(router, lifespan=lifespan)
@@ -27,3 +50,14 @@ auth0 = get_auth0()
 def root():
     logger.info("Root endpoint accessed")
     return {"message": "Server is running"}
+
+
+@app.get("/ready", description="Readiness probe: 503 until the retriever has loaded")
+def ready():
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
@@ -1,4 +1,6 @@
-from sqlalchemy import ForeignKey, UUID, Column, DateTime, String, func, text
+import uuid
+
+from sqlalchemy import ForeignKey, UUID, Column, DateTime, String, Text, func, text
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 
@@ -6,11 +8,15 @@ from app.core.db import Base
 class Chat(Base):
     __tablename__ = "chats"
 
-    id = Column(UUID, primary_key=True, index=True, server_default=text("uuid_generate_v4()"))
+    id = Column(UUID, primary_key=True, index=True, default=uuid.uuid4, server_default=text("uuid_generate_v4()"))
     chat_title = Column(String, index=True, nullable=False)
     # pylint: disable=not-callable
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    # Rolling summary of turns that no longer fit in the prompt's history budget,
+    # covering every message up to and including history_summary_until
+    history_summary = Column(Text, nullable=True)
+    history_summary_until = Column(DateTime(timezone=True), nullable=True)
     
     messages = relationship(
         "Message", back_populates="chat", cascade="all, delete-orphan"
@@ -1,5 +1,8 @@
 import enum
-from sqlalchemy import UUID, Column, DateTime, ForeignKey, Text, func, Enum, text as sql_text
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import UUID, Column, DateTime, ForeignKey, Index, Text, func, Enum, text as sql_text
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 
@@ -9,14 +12,23 @@ class MessageSenderType(enum.Enum):
     SYSTEM = "system"
 
 
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Serves keyset pagination: WHERE chat_id = ? ORDER BY created_at, id
+        Index("ix_messages_chat_id_created_at_id", "chat_id", "created_at", "id"),
+    )
 
-    id = Column(UUID, primary_key=True, index=True, server_default=sql_text("uuid_generate_v4()"))
+    id = Column(UUID, primary_key=True, index=True, default=uuid.uuid4, server_default=sql_text("uuid_generate_v4()"))
     chat_id = Column(UUID(as_uuid=True), ForeignKey("chats.id"), nullable=False)
     text = Column(Text, index=True, nullable=False)
     sent_by = Column(Enum(MessageSenderType), nullable=False)
+    # Set in Python with microseconds so cursors order consistently on every backend
     # pylint: disable=not-callable
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
 
     chat = relationship("Chat", back_populates="messages")
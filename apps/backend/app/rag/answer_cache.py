@@ -0,0 +1,168 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import NamedTuple
+
+import faiss
+import numpy as np
+
+from app.core.config import get_settings
+from app.rag.retriever import RetrievalContext
+
+logger = logging.getLogger(__name__)
+
+# Neighbours examined per lookup; a close paraphrase may have different section ids
+_CANDIDATES = 4
+
+# Years and amounts; "the limit in 2023" and "in 2024" embed almost identically
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+class _Entry(NamedTuple):
+    answer: str
+    section_ids: frozenset[str]
+    numbers: tuple[str, ...]
+    created_at: float
+    latency: float
+
+
+class SemanticAnswerCache:
+    """
+    Answers to earlier questions, indexed by question vector.
+
+    A new question is served from the cache when an earlier question lies
+    within `threshold` cosine similarity, retrieved the same sections and
+    mentions the same numbers (years, amounts).
+    Entries expire after `ttl_seconds`, the least recently used entry is
+    evicted beyond `max_size`, and the whole cache is dropped when the
+    retriever reports a new knowledge index version.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_size: int = 1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+
+        self._index = None
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._next_id = 0
+        self._index_version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    def lookup(self, retrieval: RetrievalContext) -> str | None:
+        with self._lock:
+            self._check_version(retrieval)
+
+            if self._index is None or not self._entries:
+                self.misses += 1
+                return None
+
+            section_ids = _section_ids(retrieval)
+            numbers = _numbers(retrieval.question)
+            scores, ids = self._index.search(retrieval.query_vec, min(_CANDIDATES, len(self._entries)))
+            now = time.monotonic()
+
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id == -1 or score < self.threshold:
+                    break
+
+                entry = self._entries[int(entry_id)]
+                if now - entry.created_at > self.ttl_seconds:
+                    self._remove(int(entry_id))
+                    continue
+
+                if entry.section_ids == section_ids and entry.numbers == numbers:
+                    self._entries.move_to_end(int(entry_id))
+                    self.hits += 1
+                    self.latency_saved += entry.latency
+                    logger.info("Answer cache hit (similarity %.3f).", score)
+                    return entry.answer
+
+            self.misses += 1
+            return None
+
+    def store(self, retrieval: RetrievalContext, answer: str, latency: float) -> None:
+        if not answer:
+            return
+
+        with self._lock:
+            self._check_version(retrieval)
+
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(retrieval.query_vec.shape[1]))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(retrieval.query_vec, np.array([entry_id], dtype="int64"))
+            self._entries[entry_id] = _Entry(
+                answer, _section_ids(retrieval), _numbers(retrieval.question), time.monotonic(), latency
+            )
+
+            self._evict()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._index = None
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "latency_saved_seconds": self.latency_saved,
+            }
+
+    def _check_version(self, retrieval: RetrievalContext) -> None:
+        version = retrieval.retriever.version
+        if version != self._index_version:
+            if self._entries:
+                logger.info("Knowledge index changed; dropping %d cached answers.", len(self._entries))
+            self._index = None
+            self._entries.clear()
+            self._index_version = version
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        expired = [i for i, e in self._entries.items() if now - e.created_at > self.ttl_seconds]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int) -> None:
+        del self._entries[entry_id]
+        self._index.remove_ids(np.array([entry_id], dtype="int64"))
+
+
+def _section_ids(retrieval: RetrievalContext) -> frozenset[str]:
+    return frozenset(hit["id"] for hit in retrieval.hits)
+
+
+def _numbers(question: str) -> tuple[str, ...]:
+    return tuple(number.replace(",", "") for number in _NUMBER.findall(question))
+
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> SemanticAnswerCache | None:
+    settings = get_settings()
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+
+    return SemanticAnswerCache(
+        threshold=settings.ANSWER_CACHE_THRESHOLD,
+        ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+        max_size=settings.ANSWER_CACHE_SIZE,
+    )
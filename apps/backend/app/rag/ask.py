@@ -1,37 +1,184 @@
 import logging
+import time
+from typing import NamedTuple
 
+from app.agents.router import route_question
 from app.agents.tfsa_agent import TFSAAagent
+from app.core.config import get_settings
+from app.core.metrics import STAGE_LATENCY, record_prompt, record_tokens_saved, record_usage, timed
 from app.schemas.chat import CalculationAnswer
-from app.rag.prompt import build_context, build_prompt
+from app.rag.answer_cache import get_answer_cache
+from app.rag.history import is_follow_up
+from app.rag.prompt import build_budgeted_prompt
+from app.rag.retriever import RetrievalContext
+from app.rag.templates import render_calculation_answer
 
 logger = logging.getLogger(__name__)
 agent = TFSAAagent()
 
-def ask_llm(chunks, question: str, client, model: str, chat_history: str = "") -> str:
-    agent_result = agent.handle_question(question)
+class PreparedAnswer(NamedTuple):
+    """
+    What to send the LLM for a question, or the finished answer when the
+    question needs no LLM call. `used_tool` is True when a tool result went
+    into either; those answers depend on details of the question (e.g. a
+    year), so they bypass the semantic answer cache.
+    """
+    prompt: str | None
+    used_tool: bool
+    answer: str | None = None
+
+
+def prepare_prompt(
+    retrieval: RetrievalContext, question: str, chat_history: str = "", history_tokens_saved: int = 0
+) -> PreparedAnswer:
+    """
+    Build the LLM prompt for a question, with the chat history when given.
+    `history_tokens_saved` (from `fit_history`) is recorded only when a
+    prompt actually includes that history.
+
+    With CALCULATION_FAST_PATH_ENABLED, a question the router is confident
+    only asks for a contribution-room amount is answered from a template
+    over the tool result instead.
+    """
+    route = route_question(question)
+    agent_result = agent.handle_question(question, retrieval=retrieval, route=route)
 
     logger.info("Agent result: %s", agent_result)
-    if agent_result:
-        if isinstance(agent_result, CalculationAnswer):
-            sections = agent_result.sections
+    if not isinstance(agent_result, CalculationAnswer):
+        with timed("prompt_build"):
+            prompt = build_budgeted_prompt(retrieval.hits, question, chat_history=chat_history)
+        record_prompt(prompt)
+        if chat_history:
+            record_tokens_saved("history", history_tokens_saved)
+        return PreparedAnswer(prompt, False)
 
-            context = build_context(sections)
+    if route.confident and get_settings().CALCULATION_FAST_PATH_ENABLED:
+        logger.info("Calculation answered from the template; skipping the LLM.")
+        with timed("template_render"):
+            return PreparedAnswer(None, True, render_calculation_answer(agent_result))
 
-            prompt = build_prompt(context=context, question=question, tool_result=agent_result, chat_history=chat_history)
+    with timed("prompt_build"):
+        prompt = build_budgeted_prompt(
+            agent_result.sections, question, tool_result=agent_result, chat_history=chat_history
+        )
+    record_prompt(prompt)
+    if chat_history:
+        record_tokens_saved("history", history_tokens_saved)
+    return PreparedAnswer(prompt, True)
 
-            response = client.models.generate_content(
-                model=model,
-                contents=prompt
-            )
 
-            return response.text
+def _answer_cache_for(retrieval: RetrievalContext, used_tool: bool, chat_history: str = ""):
+    # Cached answers are keyed on the question alone, not on the filters it was
+    # asked with or, for follow-ups that refer back to it, the conversation
+    if (
+        used_tool
+        or (chat_history and is_follow_up(retrieval.question))
+        or retrieval.query_vec is None
+        or (retrieval.filters and retrieval.filters.conditions())
+    ):
+        return None
+    return get_answer_cache()
 
-    context = build_context(chunks)
-    prompt = build_prompt(context, question)
 
-    response = client.models.generate_content(
-        model=model,
-        contents=prompt
+def ask_llm(
+    retrieval: RetrievalContext,
+    question: str,
+    client,
+    model: str,
+    chat_history: str = "",
+    history_tokens_saved: int = 0,
+) -> str:
+    prompt, used_tool, answer = prepare_prompt(
+        retrieval, question, chat_history=chat_history, history_tokens_saved=history_tokens_saved
     )
+    if answer is not None:
+        return answer
+
+    cache = _answer_cache_for(retrieval, used_tool, chat_history)
+    if cache and (cached := cache.lookup(retrieval)):
+        return cached
 
+    started = time.perf_counter()
+    with timed("generate"):
+        response = client.models.generate_content(
+            model=model,
+            contents=prompt
+        )
+    record_usage(response)
+
+    if cache:
+        cache.store(retrieval, response.text, time.perf_counter() - started)
     return response.text
+
+
+async def ask_llm_async(
+    retrieval: RetrievalContext,
+    question: str,
+    client,
+    model: str,
+    chat_history: str = "",
+    history_tokens_saved: int = 0,
+) -> str:
+    prompt, used_tool, answer = prepare_prompt(
+        retrieval, question, chat_history=chat_history, history_tokens_saved=history_tokens_saved
+    )
+    if answer is not None:
+        return answer
+
+    cache = _answer_cache_for(retrieval, used_tool, chat_history)
+    if cache and (cached := cache.lookup(retrieval)):
+        return cached
+
+    started = time.perf_counter()
+    with timed("generate"):
+        response = await client.aio.models.generate_content(
+            model=model,
+            contents=prompt
+        )
+    record_usage(response)
+
+    if cache:
+        cache.store(retrieval, response.text, time.perf_counter() - started)
+    return response.text
+
+
+async def stream_llm(
+    retrieval: RetrievalContext,
+    question: str,
+    client,
+    model: str,
+    chat_history: str = "",
+    history_tokens_saved: int = 0,
+):
+    """Yield answer text fragments as the model produces them."""
+    prompt, used_tool, answer = prepare_prompt(
+        retrieval, question, chat_history=chat_history, history_tokens_saved=history_tokens_saved
+    )
+    if answer is not None:
+        yield answer
+        return
+
+    cache = _answer_cache_for(retrieval, used_tool, chat_history)
+    if cache and (cached := cache.lookup(retrieval)):
+        yield cached
+        return
+
+    started = time.perf_counter()
+    parts = []
+    chunk = None
+    async for chunk in await client.aio.models.generate_content_stream(
+        model=model,
+        contents=prompt
+    ):
+        if chunk.text:
+            if not parts:
+                STAGE_LATENCY.labels("generate_first_token").observe(time.perf_counter() - started)
+            parts.append(chunk.text)
+            yield chunk.text
+
+    STAGE_LATENCY.labels("generate").observe(time.perf_counter() - started)
+    # The final chunk carries the usage totals for the whole stream
+    record_usage(chunk)
+
+    if cache:
+        cache.store(retrieval, "".join(parts), time.perf_counter() - started)
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+
+from app.core.config import get_settings
+from app.rag.ask import ask_llm_async
+from app.rag.partitions import RetrievalFilter
+from app.rag.retriever import FaissRetriever, RetrievalContext
+
+logger = logging.getLogger(__name__)
+
+
+async def iter_answers(
+    questions: list[str],
+    retriever: FaissRetriever,
+    client,
+    model: str,
+    concurrency: int | None = None,
+    filters: RetrievalFilter | None = None,
+):
+    """
+    Answer many questions, yielding results in question order.
+
+    Retrieval runs once for the whole batch (one embedding call, one
+    multi-query FAISS search). Generation then fans out with at most
+    `concurrency` (default BATCH_CONCURRENCY) calls in flight. Each result is
+    yielded as soon as it and every earlier one are done. A question whose
+    generation fails gets an `error` entry instead of an answer. `filters` applies to
+    every question in the batch.
+    """
+    valid = [i for i, q in enumerate(questions) if q.strip()]
+    contexts: list[RetrievalContext | None] = [None] * len(questions)
+    for i, context in zip(valid, await retriever.aretrieve_batch([questions[i] for i in valid], filters=filters)):
+        contexts[i] = context
+
+    semaphore = asyncio.Semaphore(concurrency or get_settings().BATCH_CONCURRENCY)
+
+    async def answer(question: str, context: RetrievalContext | None) -> dict:
+        if context is None:
+            return {"answer": "Please provide a valid question."}
+        if not context.hits:
+            return {"answer": "No relevant CRA sections found."}
+
+        async with semaphore:
+            try:
+                text = await ask_llm_async(context, question, client, model)
+            except Exception:  # pylint: disable=broad-exception-caught
+                # One failed generation must not cut off the rest of the batch
+                logger.exception("Answer generation failed for a batch question")
+                return {"answer": None, "error": "Answer generation failed."}
+        return {"answer": text or "No answer could be generated."}
+
+    tasks = [asyncio.create_task(answer(q, c)) for q, c in zip(questions, contexts)]
+    try:
+        for question, context, task in zip(questions, contexts, tasks):
+            yield {
+                "question": question,
+                **await task,
+                "sections": [hit["id"] for hit in context.hits] if context else [],
+            }
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def answer_questions(
+    questions: list[str],
+    retriever: FaissRetriever,
+    client,
+    model: str,
+    concurrency: int | None = None,
+    filters: RetrievalFilter | None = None,
+) -> list[dict]:
+    logger.info("Answering a batch of %d questions.", len(questions))
+    return [result async for result in iter_answers(questions, retriever, client, model, concurrency, filters)]
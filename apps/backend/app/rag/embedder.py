@@ -0,0 +1,143 @@
+import logging
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import faiss
+import numpy as np
+from google.genai import errors
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Rate limiting and transient server errors; anything else fails the batch
+RETRYABLE_STATUS = {429, 500, 503}
+
+
+def embed_batch(texts: list[str], client):
+    response = client.models.embed_content(
+        model=get_settings().GEMINI_EMBEDDING_MODEL,
+        contents=texts
+    )
+    return [e.values for e in response.embeddings]
+
+
+class EmbeddingCheckpoint:
+    """
+    Vectors embedded so far in an ingest run, flushed after every batch.
+
+    If the run is interrupted, the next ingest loads these and embeds only
+    what is left. Entries for another embedding model are ignored.
+    """
+
+    def __init__(self, path: str, embedding_model: str):
+        self.path = path
+        self.embedding_model = embedding_model
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoint (
+                model TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, chunk_hash)
+            )
+            """
+        )
+        self._db.commit()
+
+    def load(self) -> dict[str, np.ndarray]:
+        return {
+            chunk_hash: np.frombuffer(blob, dtype="float32")
+            for chunk_hash, blob in self._db.execute(
+                "SELECT chunk_hash, vector FROM checkpoint WHERE model = ?", (self.embedding_model,)
+            )
+        }
+
+    def save(self, vectors: dict[str, np.ndarray]) -> None:
+        self._db.executemany(
+            "INSERT OR REPLACE INTO checkpoint (model, chunk_hash, vector) VALUES (?, ?, ?)",
+            [(self.embedding_model, h, v.tobytes()) for h, v in vectors.items()],
+        )
+        self._db.commit()
+
+    def delete(self) -> None:
+        self._db.close()
+        os.remove(self.path)
+
+
+def _embed_with_retry(texts: list[str], client, max_retries: int, backoff_seconds: float):
+    attempt = 0
+    while True:
+        try:
+            return embed_batch(texts, client)
+        except errors.APIError as e:
+            # The last attempt's error, or any non-retryable one, goes to the caller
+            if e.code not in RETRYABLE_STATUS or attempt == max_retries:
+                raise
+
+            delay = backoff_seconds * 2 ** attempt * random.uniform(0.5, 1.5)
+            logger.warning(
+                "Embedding batch of %d failed with %s; retrying in %.1fs (attempt %d/%d)",
+                len(texts), e.code, delay, attempt + 1, max_retries,
+            )
+            time.sleep(delay)
+            attempt += 1
+
+
+def embed_texts(
+    texts: dict[str, str],
+    client,
+    checkpoint: EmbeddingCheckpoint | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Embed `texts` (chunk hash -> text) and return normalized vectors by hash.
+
+    Texts are sent in batches of EMBED_BATCH_SIZE with up to EMBED_CONCURRENCY
+    batches in flight. Rate-limited or failed batches are retried with
+    exponential backoff, and every finished batch is written to `checkpoint`.
+    """
+    settings = get_settings()
+    keys = list(texts)
+    batches = [keys[i:i + settings.EMBED_BATCH_SIZE] for i in range(0, len(keys), settings.EMBED_BATCH_SIZE)]
+
+    vectors: dict[str, np.ndarray] = {}
+    started = time.perf_counter()
+
+    pool = ThreadPoolExecutor(max_workers=settings.EMBED_CONCURRENCY)
+    try:
+        futures = {
+            pool.submit(
+                _embed_with_retry,
+                [texts[k] for k in batch],
+                client,
+                settings.EMBED_MAX_RETRIES,
+                settings.EMBED_BACKOFF_SECONDS,
+            ): batch
+            for batch in batches
+        }
+
+        for future in as_completed(futures):
+            batch = futures[future]
+            embeddings = np.array(future.result(), dtype="float32")
+            faiss.normalize_L2(embeddings)
+
+            batch_vectors = dict(zip(batch, embeddings))
+            if checkpoint:
+                checkpoint.save(batch_vectors)
+            vectors.update(batch_vectors)
+
+            logger.info("Embedded %d/%d chunks", len(vectors), len(keys))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    if keys:
+        logger.info(
+            "Embedded %d chunks in %.2fs (%.1f chunks/s)",
+            len(keys), elapsed, len(keys) / elapsed if elapsed else float("inf"),
+        )
+    return vectors
@@ -0,0 +1,123 @@
+import logging
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different phrasings share a key."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class EmbeddingCache:
+    """
+    Query-embedding cache keyed by (embedding model, normalized query text).
+
+    Entries live in a bounded in-memory LRU. When `path` is set, vectors are
+    also written to a SQLite file so they survive restarts and can be shared
+    by every worker on the host.
+    """
+
+    def __init__(self, max_size: int = 1024, path: str | None = None):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    model TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, query)
+                )
+                """
+            )
+            self._db.commit()
+
+    def get(self, query: str, model: str) -> np.ndarray | None:
+        key = (model, normalize_query(query))
+
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector.copy()
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?",
+                    key,
+                ).fetchone()
+                if row:
+                    vector = np.frombuffer(row[0], dtype="float32").reshape(1, -1)
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector.copy()
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, model: str, vector: np.ndarray) -> None:
+        key = (model, normalize_query(query))
+        vector = np.ascontiguousarray(vector, dtype="float32")
+
+        with self._lock:
+            self._remember(key, vector.copy())
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (model, query, vector) VALUES (?, ?, ?)",
+                    (*key, vector.tobytes()),
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM query_embeddings")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key: tuple[str, str], vector: np.ndarray) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> EmbeddingCache:
+    settings = get_settings()
+    return EmbeddingCache(
+        max_size=settings.EMBEDDING_CACHE_SIZE,
+        path=settings.EMBEDDING_CACHE_PATH or None,
+    )
@@ -0,0 +1,94 @@
+import re
+from typing import NamedTuple
+
+from app.core.config import get_settings
+from app.rag.prompt import CHARS_PER_TOKEN, estimate_tokens
+from app.utils.utils import format_message, is_user_message
+
+# Longest excerpt of a single message kept in the summary
+SUMMARY_LINE_CHARS = 200
+
+# Questions that lean on earlier turns: "and for 2024?", "what about RRSPs?", "is that taxed?"
+_FOLLOW_UP = re.compile(
+    r"""
+    ^\s*(?:and|but|so|also|then|what\s+about|how\s+about|what\s+if)\b
+    | \b(?:it|its|that|this|those|these|they|them|same|above|previous|earlier|mentioned|you\s+said)\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+class HistoryWindow(NamedTuple):
+    """Chat history as it goes into the prompt, plus the summary to store on the chat."""
+    text: str
+    summary: str
+    folded: list
+    tokens_saved: int
+
+
+def _summary_line(msg) -> str:
+    # The first sentence is usually the question asked or the answer's gist
+    text = " ".join(msg.text.split())
+    first = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0][:SUMMARY_LINE_CHARS]
+    return f"{'User asked' if is_user_message(msg) else 'Assistant answered'}: {first}"
+
+
+def is_follow_up(question: str) -> bool:
+    """Whether a question probably refers to earlier turns, so its answer depends on the chat history."""
+    return _FOLLOW_UP.search(question) is not None
+
+
+def roll_summary(summary: str, messages: list, max_tokens: int) -> str:
+    """Append one line per message to `summary`, dropping the oldest lines beyond `max_tokens`."""
+    lines = [line for line in summary.splitlines() if line] + [_summary_line(m) for m in messages]
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max(0, max_tokens * CHARS_PER_TOKEN - 1)].rstrip() + "…"
+
+
+def _latest_turn_start(messages: list) -> int:
+    """Index of the last user message, where the latest question-and-answer turn begins."""
+    for i in range(len(messages) - 1, -1, -1):
+        if is_user_message(messages[i]):
+            return i
+    return max(len(messages) - 1, 0)
+
+
+def fit_history(summary: str, messages: list) -> HistoryWindow:
+    """
+    Fit a chat's history into HISTORY_TOKEN_BUDGET.
+
+    `messages` are the turns not yet summarized, oldest first. The latest
+    turn (the last question and its answer) is always kept verbatim, cut
+    short if it alone exceeds the budget left after the summary's share, as
+    follow-up questions usually refer to it. Earlier turns are kept while
+    they fit in what remains; older ones are folded into the rolling
+    summary, which the caller stores on the chat so they are never loaded
+    again.
+    """
+    settings = get_settings()
+    verbatim_budget = settings.HISTORY_TOKEN_BUDGET - settings.HISTORY_SUMMARY_TOKENS
+
+    lines = [format_message(m) for m in messages]
+    latest_start = start = _latest_turn_start(messages)
+    latest = _truncate("\n".join(lines[latest_start:]), verbatim_budget)
+    used = estimate_tokens(latest)
+    while start > 0 and used + estimate_tokens(lines[start - 1]) + 1 <= verbatim_budget:
+        used += estimate_tokens(lines[start - 1]) + 1
+        start -= 1
+
+    folded = messages[:start]
+    if folded:
+        summary = roll_summary(summary, folded, settings.HISTORY_SUMMARY_TOKENS)
+
+    recent = "\n".join(lines[start:latest_start] + ([latest] if latest else []))
+    text = f"Summary of earlier conversation:\n{summary}\n\n{recent}" if summary else recent
+
+    tokens_saved = estimate_tokens("\n".join(lines)) - estimate_tokens(text)
+    return HistoryWindow(text.strip(), summary, folded, tokens_saved)
@@ -0,0 +1,113 @@
+import logging
+
+import faiss
+import numpy as np
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+# k-means wants roughly this many training points per IVF list
+_MIN_POINTS_PER_LIST = 39
+
+
+def resolve_index_type(n: int, index_type: str | None = None) -> str:
+    """
+    The index type `build_index` uses for `n` vectors: the configured
+    INDEX_TYPE (or `index_type`), unless the corpus is too small to train it.
+    Corpora too small to train a product quantizer fall back to IVF-Flat, and
+    any IVF corpus too small for a single list falls back to a flat index.
+    """
+    settings = get_settings()
+    index_type = index_type or settings.INDEX_TYPE
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown INDEX_TYPE {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+
+    if index_type == "ivf_pq" and n < 2 ** settings.INDEX_PQ_NBITS * _MIN_POINTS_PER_LIST:
+        index_type = "ivf_flat"
+    if index_type in ("ivf_flat", "ivf_pq") and min(settings.INDEX_NLIST, n // _MIN_POINTS_PER_LIST) < 1:
+        index_type = "flat"
+    return index_type
+
+
+def build_index(vectors: np.ndarray, ids: np.ndarray, index_type: str | None = None):
+    """
+    Build an inner-product index of the configured type over normalized vectors.
+
+    Every index returned supports `add_with_ids`, and the ids are the metadata
+    row ids. IVF indexes are trained on `vectors` first; corpora too small to
+    train the configured type fall back as `resolve_index_type` describes.
+    """
+    settings = get_settings()
+    requested = index_type or settings.INDEX_TYPE
+    n, dimension = vectors.shape
+    index_type = resolve_index_type(n, requested)
+    if index_type != requested:
+        logger.warning("Only %d vectors; not enough to train %s, using %s", n, requested, index_type)
+
+    nlist = min(settings.INDEX_NLIST, n // _MIN_POINTS_PER_LIST)
+
+    if index_type == "flat":
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+    elif index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dimension, settings.INDEX_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = settings.INDEX_EF_CONSTRUCTION
+        index = faiss.IndexIDMap2(hnsw)
+    else:
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFPQ(
+                quantizer, dimension, nlist, settings.INDEX_PQ_M, settings.INDEX_PQ_NBITS,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        index.train(vectors) # type: ignore
+
+    index.add_with_ids(vectors, ids) # type: ignore
+    return index
+
+
+def unwrap(index):
+    """Return the index doing the search, looking through an id map."""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def index_kind(index) -> str:
+    inner = unwrap(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def supports_remove(index) -> bool:
+    return index_kind(index) != "hnsw"
+
+
+def configure_search(index) -> None:
+    """Apply search-time parameters (nprobe, efSearch) for the index's type."""
+    settings = get_settings()
+    inner = unwrap(index)
+
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(settings.INDEX_NPROBE, inner.nlist)
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = settings.INDEX_EF_SEARCH
+
+
+def search_params(index, selector):
+    """Search parameters restricting `index` to ids accepted by `selector`, keeping its nprobe/efSearch."""
+    inner = unwrap(index)
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=inner.nprobe)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
@@ -1,38 +1,122 @@
+import argparse
+import hashlib
 import os
-import json
+import shutil
 import faiss
 import numpy as np
 
 from app.core.config import get_settings
+from app.rag.embedder import EmbeddingCheckpoint, embed_texts
+from app.rag.embedding_cache import get_embedding_cache
+from app.rag.index_factory import build_index, index_kind, resolve_index_type, supports_remove
+from app.rag.metadata_store import read_ingest_state, write_metadata
+from app.rag.partitions import write_partitions
+from app.rag.snapshots import current_snapshot, new_snapshot, publish_snapshot
 from app.utils.utils import chunk_text
 
-def embed_batch(texts: list[str], client):
-    response = client.models.embed_content(
-        model=get_settings().GEMINI_EMBEDDING_MODEL,
-        contents=texts
+CHECKPOINT_PATH = "app/embedding/ingest_checkpoint.sqlite"
+
+def _query_vectors(response):
+    vectors = np.array(
+        [e.values for e in response.embeddings],
+        dtype="float32"
     )
-    return [e.values for e in response.embeddings]
+
+    faiss.normalize_L2(vectors)
+    return vectors
 
 def embed_query(query: str, client):
+    model = get_settings().GEMINI_EMBEDDING_MODEL
+    cache = get_embedding_cache()
+
+    cached = cache.get(query, model)
+    if cached is not None:
+        return cached
+
     response = client.models.embed_content(
-        model=get_settings().GEMINI_EMBEDDING_MODEL,
+        model=model,
         contents=query
     )
-    vector = np.array(
-        [response.embeddings[0].values],
-        dtype="float32"
-    )
+    vector = _query_vectors(response)[:1]
+    cache.put(query, model, vector)
+    return vector
+
+async def embed_query_async(query: str, client):
+    model = get_settings().GEMINI_EMBEDDING_MODEL
+    cache = get_embedding_cache()
 
-    faiss.normalize_L2(vector)
+    cached = cache.get(query, model)
+    if cached is not None:
+        return cached
+
+    response = await client.aio.models.embed_content(
+        model=model,
+        contents=query
+    )
+    vector = _query_vectors(response)[:1]
+    cache.put(query, model, vector)
     return vector
-    
-def ingest(client):
-    knowledge_dir = os.path.join(os.path.dirname(__file__), "knowledge")
+
+def _split_cached(queries: list[str], model: str):
+    """Cached vectors by query, plus the distinct queries that still need embedding."""
+    cache = get_embedding_cache()
+    found = {}
+    for query in dict.fromkeys(queries):
+        vector = cache.get(query, model)
+        if vector is not None:
+            found[query] = vector
+
+    missing = [q for q in dict.fromkeys(queries) if q not in found]
+    batch_size = get_settings().EMBED_BATCH_SIZE
+    return found, [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+
+def _store_embedded(found: dict, batch: list[str], response, model: str) -> None:
+    cache = get_embedding_cache()
+    for query, vector in zip(batch, _query_vectors(response)):
+        found[query] = vector.reshape(1, -1)
+        cache.put(query, model, found[query])
+
+def embed_queries(queries: list[str], client) -> np.ndarray:
+    """
+    Embed many queries, one row per query, reusing cached vectors.
+
+    Uncached queries go out in a single embed_content call per
+    EMBED_BATCH_SIZE queries rather than one call each.
+    """
+    model = get_settings().GEMINI_EMBEDDING_MODEL
+    found, batches = _split_cached(queries, model)
+
+    for batch in batches:
+        response = client.models.embed_content(
+            model=model,
+            contents=batch
+        )
+        _store_embedded(found, batch, response, model)
+
+    return np.vstack([found[q] for q in queries])
+
+async def embed_queries_async(queries: list[str], client) -> np.ndarray:
+    model = get_settings().GEMINI_EMBEDDING_MODEL
+    found, batches = _split_cached(queries, model)
+
+    for batch in batches:
+        response = await client.aio.models.embed_content(
+            model=model,
+            contents=batch
+        )
+        _store_embedded(found, batch, response, model)
+
+    return np.vstack([found[q] for q in queries])
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def load_knowledge() -> list[dict]:
+    knowledge_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "knowledge")
     if not os.path.isdir(knowledge_dir):
         raise SystemExit(f"Missing knowledge folder at {knowledge_dir}")
 
     records = []
-    texts_to_embed = []
 
     for filename in sorted(os.listdir(knowledge_dir)):
         path = os.path.join(knowledge_dir, filename)
@@ -53,37 +137,154 @@ def ingest(client):
                 "source": "CRA",
                 "document": "RC4466 - TFSA Guide",
                 "jurisdiction": "Canada",
-                "year": 2025
+                "year": 2025,
+                "chunk_hash": chunk_hash(chunk["text"]),
             }
 
             records.append(record)
-            texts_to_embed.append(chunk["text"])
 
-    embeddings = embed_batch(texts_to_embed, client)
+    return records
 
-    for record, vector in zip(records, embeddings):
-        record["embedding"] = vector
+def _load_id_mapped_index(path: str):
+    index = faiss.read_index(path)
+    if isinstance(index, (faiss.IndexIDMap2, faiss.IndexIVF)):
+        return index
 
-    with open("app/embedding/tfsa_embeddings.json", "w", encoding="utf-8") as f:
-        json.dump(records, f, indent=2)
+    # Indexes written before incremental ingest used row positions as ids
+    id_mapped = faiss.IndexIDMap2(faiss.IndexFlatIP(index.d))
+    id_mapped.add_with_ids(index.reconstruct_n(0, index.ntotal), np.arange(index.ntotal, dtype="int64"))
+    return id_mapped
 
-    print(f"Embedded and indexed {len(records)} chunks")
+def ingest(client, incremental: bool = True):
+    """
+    Embed the knowledge folder into a new index snapshot and publish it.
 
-    vectors = np.array(
-        [r["embedding"] for r in records],
-        dtype="float32"
+    In incremental mode chunks are matched to the current snapshot by content
+    hash: unchanged chunks keep their vector and FAISS id, only new or edited
+    chunks are embedded, and chunks that disappeared are removed from the
+    id-mapped index. With INDEX_PARTITIONS, chunks are also split into one
+    sub-index per document, jurisdiction and year for filtered search, and
+    only partitions that changed are rebuilt. The snapshot is written to its
+    own directory and the manifest switched to it only once complete; running
+    workers pick it up without a restart.
+    """
+    settings = get_settings()
+    records = load_knowledge()
+    model = settings.GEMINI_EMBEDDING_MODEL
+
+    state = None
+    previous = None
+    try:
+        previous = current_snapshot()
+    except FileNotFoundError:
+        pass
+    if incremental and previous and os.path.exists(previous.index_path) and os.path.exists(previous.metadata_path):
+        state = read_ingest_state(previous.metadata_path)
+        if state and state.embedding_model != model:
+            print(f"Embedding model changed from {state.embedding_model} to {model}; re-embedding everything")
+            state = None
+
+    # Vectors from an interrupted run are as good as stored ones
+    checkpoint = EmbeddingCheckpoint(CHECKPOINT_PATH, model)
+    stored = {**(state.vectors if state else {}), **checkpoint.load()}
+    vectors = {h: stored[h] for h in {r["chunk_hash"] for r in records} if h in stored}
+
+    texts_to_embed = {r["chunk_hash"]: r["text"] for r in records if r["chunk_hash"] not in vectors}
+    vectors.update(embed_texts(texts_to_embed, client, checkpoint=checkpoint))
+
+    if state:
+        index, added, removed = _update_index(records, vectors, state.rows, previous.index_path)
+    else:
+        index, added, removed = _build_index(records, vectors), len(records), 0
+
+    snapshot = new_snapshot()
+    try:
+        write_metadata(snapshot.metadata_path, records, vectors, model)
+        faiss.write_index(index, snapshot.index_path)
+        partitions = None
+        if settings.INDEX_PARTITIONS:
+            partitions = write_partitions(
+                os.path.dirname(snapshot.index_path), records, vectors,
+                # Unchanged partitions are reused only when the previous vectors are
+                os.path.dirname(previous.index_path) if state else None,
+            )
+    except BaseException:
+        shutil.rmtree(os.path.dirname(snapshot.index_path), ignore_errors=True)
+        raise
+    publish_snapshot(snapshot, keep=settings.INDEX_SNAPSHOTS_KEEP)
+    checkpoint.delete()
+
+    print(
+        f"Indexed {len(records)} chunks: {len(texts_to_embed)} embedded, "
+        f"{len(records) - len(texts_to_embed)} reused, {added} added, {removed} removed"
     )
+    print(f"FAISS index holds {index.ntotal} vectors; published snapshot {snapshot.version}")
+    if partitions and partitions.total:
+        print(
+            f"Wrote {partitions.total} partition sub-indexes by document, jurisdiction and year: "
+            f"{partitions.rebuilt} rebuilt, {partitions.total - partitions.rebuilt} unchanged"
+        )
 
-    dimension = vectors.shape[1]
+def _build_index(records: list[dict], vectors: dict[str, np.ndarray]):
+    for row_id, record in enumerate(records):
+        record["row_id"] = row_id
 
-    index = faiss.IndexFlatIP(dimension)
+    return _index_records(records, vectors)
+
+def _index_records(records: list[dict], vectors: dict[str, np.ndarray]):
+    index = build_index(
+        np.stack([vectors[r["chunk_hash"]] for r in records]),
+        np.array([r["row_id"] for r in records], dtype="int64"),
+    )
+    print(f"Built {index_kind(index)} index")
+    return index
+
+def _update_index(
+    records: list[dict], vectors: dict[str, np.ndarray], previous_rows: dict[str, list[int]], index_path: str
+):
+    free = {h: list(row_ids) for h, row_ids in previous_rows.items()}
+    next_id = max((i for row_ids in free.values() for i in row_ids), default=-1) + 1
+
+    added = []
+    for record in records:
+        reusable = free.get(record["chunk_hash"])
+        if reusable:
+            record["row_id"] = reusable.pop(0)
+        else:
+            record["row_id"] = next_id
+            next_id += 1
+            added.append(record)
+
+    removed = [i for row_ids in free.values() for i in row_ids]
+
+    index = _load_id_mapped_index(index_path)
+
+    # Switching index type, or removing from HNSW, rebuilds from stored vectors. The
+    # type is the one a rebuild would pick, so a corpus too small for INDEX_TYPE
+    # keeps updating its fallback index in place
+    if index_kind(index) != resolve_index_type(len(records)) or (removed and not supports_remove(index)):
+        return _index_records(records, vectors), len(added), len(removed)
+
+    if removed:
+        index.remove_ids(np.array(removed, dtype="int64"))
+    if added:
+        index.add_with_ids( # type: ignore
+            np.stack([vectors[r["chunk_hash"]] for r in added]),
+            np.array([r["row_id"] for r in added], dtype="int64"),
+        )
+
+    return index, len(added), len(removed)
 
-    faiss.normalize_L2(vectors)
 
-    index.add(vectors) # type: ignore
+if __name__ == "__main__":
+    import logging
 
-    print(f"FAISS index built with {index.ntotal} vectors")
+    from app.llm.gemini import get_gemini_client
 
-    faiss.write_index(index, "app/embedding/tfsa.faiss")
+    logging.basicConfig(level=logging.INFO)
 
+    parser = argparse.ArgumentParser(description="Embed app/knowledge into the FAISS index.")
+    parser.add_argument("--full", action="store_true", help="re-embed every chunk and rebuild the index")
+    args = parser.parse_args()
 
+    ingest(get_gemini_client(), incremental=not args.full)
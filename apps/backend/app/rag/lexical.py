@@ -0,0 +1,49 @@
+import re
+
+# Words too common in TFSA questions to carry any ranking signal
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by can do does for from how i if in is it my of on or
+    the to was what when where which who why will with you your me much many
+    """.split()
+)
+
+# Form and guide numbers such as RC4466, RC243 or T4A
+IDENTIFIER = re.compile(r"^[a-z]+\d+[a-z]*$")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens without stopwords, matching FTS5's unicode61 tokenizer."""
+    return [t for t in re.findall(r"\w+", text.lower()) if t not in STOPWORDS]
+
+
+def fts_query(tokens: list[str]) -> str:
+    """OR together quoted tokens so BM25 ranks partial matches instead of requiring all terms."""
+    return " OR ".join(f'"{t}"' for t in dict.fromkeys(tokens))
+
+
+def is_strong_match(query_tokens: list[str], hit: dict, max_terms: int) -> bool:
+    """
+    Whether the top lexical hit answers the query without a semantic search.
+
+    That is the case when the query names a form or guide number that the
+    hit contains, or when a short query is exactly the hit's section title
+    (e.g. "TFSA dollar limit").
+    """
+    if not query_tokens:
+        return False
+
+    hit_tokens = set(tokenize(f"{hit['section']} {hit['text']}"))
+    if any(IDENTIFIER.match(t) and t in hit_tokens for t in query_tokens):
+        return True
+
+    return len(query_tokens) <= max_terms and set(query_tokens) <= set(tokenize(hit["section"]))
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = 60) -> dict[int, float]:
+    """Combine ranked id lists; each list contributes 1 / (k + rank) per id."""
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row_id in enumerate(ranking, start=1):
+            scores[row_id] = scores.get(row_id, 0.0) + 1.0 / (k + rank)
+    return dict(sorted(scores.items(), key=lambda item: item[1], reverse=True))
@@ -0,0 +1,170 @@
+import os
+import sqlite3
+import threading
+from typing import NamedTuple
+
+import numpy as np
+
+from app.core.metrics import timed
+from app.rag.lexical import fts_query
+
+COLUMNS = ("id", "section", "topic", "text", "source", "document", "jurisdiction", "year", "chunk_hash")
+
+
+class IngestState(NamedTuple):
+    """What a previous ingest left behind, used to skip re-embedding unchanged chunks."""
+    embedding_model: str
+    rows: dict[str, list[int]]
+    vectors: dict[str, np.ndarray]
+
+
+def write_metadata(path: str, records: list[dict], vectors: dict[str, np.ndarray], embedding_model: str) -> None:
+    """
+    Write chunk records to a SQLite file keyed by FAISS row id.
+
+    Each record carries its `row_id` (the FAISS id of its vector) and
+    `chunk_hash`. Normalized vectors are kept in a separate table, keyed by
+    chunk hash, for the next incremental ingest; the retriever never reads
+    them. A full-text index over section titles and text backs BM25 lexical
+    search. The file is built next to `path` and moved into place so readers
+    never see a partial store.
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    with sqlite3.connect(tmp_path) as db:
+        db.execute(
+            f"""
+            CREATE TABLE chunks (
+                row_id INTEGER PRIMARY KEY,
+                {", ".join(f"{c} {'INTEGER' if c == 'year' else 'TEXT'}" for c in COLUMNS)}
+            )
+            """
+        )
+        db.execute("CREATE TABLE vectors (chunk_hash TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        db.execute("CREATE TABLE ingest_info (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+        db.executemany(
+            f"INSERT INTO chunks (row_id, {', '.join(COLUMNS)}) VALUES (?{', ?' * len(COLUMNS)})",
+            [(r["row_id"], *(r.get(c) for c in COLUMNS)) for r in records],
+        )
+        db.executemany(
+            "INSERT INTO vectors (chunk_hash, vector) VALUES (?, ?)",
+            [(h, np.asarray(v, dtype="float32").tobytes()) for h, v in vectors.items()],
+        )
+        db.execute("INSERT INTO ingest_info (key, value) VALUES ('embedding_model', ?)", (embedding_model,))
+
+        db.execute(
+            "CREATE VIRTUAL TABLE chunks_fts USING fts5("
+            "section, text, content='chunks', content_rowid='row_id')"
+        )
+        db.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+    db.close()
+
+    os.replace(tmp_path, path)
+
+
+def read_ingest_state(path: str) -> IngestState | None:
+    """Load row ids and stored vectors per chunk hash, or None for stores without them."""
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not {"vectors", "ingest_info"} <= tables:
+            return None
+
+        embedding_model = db.execute(
+            "SELECT value FROM ingest_info WHERE key = 'embedding_model'"
+        ).fetchone()[0]
+
+        rows: dict[str, list[int]] = {}
+        for row_id, chunk_hash in db.execute("SELECT row_id, chunk_hash FROM chunks ORDER BY row_id"):
+            rows.setdefault(chunk_hash, []).append(row_id)
+
+        vectors = {
+            chunk_hash: np.frombuffer(blob, dtype="float32")
+            for chunk_hash, blob in db.execute("SELECT chunk_hash, vector FROM vectors")
+        }
+    finally:
+        db.close()
+
+    return IngestState(embedding_model, rows, vectors)
+
+
+class MetadataStore:
+    """
+    Read-only view over the chunk metadata written by `write_metadata`.
+
+    Nothing is loaded up front; `get_many` reads just the rows for a search's
+    hits, so memory stays flat as the corpus grows. With `mmap`, SQLite reads
+    pages through a shared mapping of the file rather than copying them into
+    its per-connection cache.
+    """
+
+    def __init__(self, path: str, mmap: bool = False):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Missing metadata store at {path}")
+
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        if mmap:
+            self._db.execute(f"PRAGMA mmap_size = {os.path.getsize(path)}")
+        self._lock = threading.Lock()
+        self.has_lexical = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'"
+        ).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def get_many(self, row_ids: list[int]) -> dict[int, dict]:
+        if not row_ids:
+            return {}
+
+        with timed("metadata_fetch"), self._lock:
+            rows = self._db.execute(
+                f"SELECT row_id, {', '.join(COLUMNS)} FROM chunks "
+                f"WHERE row_id IN ({', '.join('?' * len(row_ids))})",
+                row_ids,
+            ).fetchall()
+
+        return {row[0]: dict(zip(COLUMNS, row[1:])) for row in rows}
+
+    def row_ids(self, filters) -> list[int]:
+        """Row ids of the chunks matching a `RetrievalFilter`."""
+        where, params = _where(filters)
+        with self._lock:
+            rows = self._db.execute(f"SELECT row_id FROM chunks {where} ORDER BY row_id", params).fetchall()
+        return [row[0] for row in rows]
+
+    def lexical_search(self, tokens: list[str], top_k: int, filters=None) -> list[tuple[int, float]]:
+        """BM25-ranked (row_id, score) pairs for the query tokens, best first."""
+        if not tokens or not self.has_lexical:
+            return []
+
+        where, params = _where(filters, prefix="AND")
+        join = "JOIN chunks ON chunks.row_id = chunks_fts.rowid " if where else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT chunks_fts.rowid, bm25(chunks_fts) FROM chunks_fts {join}"
+                f"WHERE chunks_fts MATCH ? {where} "
+                "ORDER BY bm25(chunks_fts) LIMIT ?",
+                (fts_query(tokens), *params, top_k),
+            ).fetchall()
+
+        # FTS5 reports BM25 as a negative number where lower is better
+        return [(row_id, -score) for row_id, score in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _where(filters, prefix: str = "WHERE") -> tuple[str, tuple]:
+    """SQL conditions on `chunks` for a `RetrievalFilter` (None matches everything)."""
+    conditions = filters.conditions() if filters is not None else {}
+    if not conditions:
+        return "", ()
+    # Field names come from RetrievalFilter, never from user input
+    clause = " AND ".join(f"chunks.{field} = ?" for field in conditions)
+    return f"{prefix} {clause}", tuple(conditions.values())
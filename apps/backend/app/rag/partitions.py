@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from functools import lru_cache
+from typing import NamedTuple
+
+import faiss
+import numpy as np
+
+from app.rag.index_factory import build_index, configure_search, resolve_index_type, search_params
+
+logger = logging.getLogger(__name__)
+
+PARTITION_FIELDS = ("document", "jurisdiction", "year")
+PARTITIONS_FILE = "partitions.json"
+PARTITIONS_DIR = "partitions"
+
+
+class RetrievalFilter(NamedTuple):
+    """Restrict retrieval to chunks whose metadata equals every field that is set."""
+    document: str | None = None
+    jurisdiction: str | None = None
+    year: int | None = None
+
+    def conditions(self) -> dict:
+        return {field: value for field, value in self._asdict().items() if value is not None}
+
+    def matches(self, item: dict) -> bool:
+        return all(item.get(field) == value for field, value in self.conditions().items())
+
+
+class PartitionsWritten(NamedTuple):
+    total: int
+    rebuilt: int
+
+
+def _fingerprint(members: list[dict]) -> str:
+    """Identifies a partition's contents: its rows, their chunks and the index type built over them."""
+    rows = sorted((r["row_id"], r["chunk_hash"]) for r in members)
+    payload = json.dumps([resolve_index_type(len(members)), rows])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _previous_partitions(directory: str | None) -> dict[str, str]:
+    """Fingerprint -> sub-index path of the partitions in an earlier snapshot directory."""
+    if directory is None or not os.path.exists(os.path.join(directory, PARTITIONS_FILE)):
+        return {}
+    with open(os.path.join(directory, PARTITIONS_FILE), encoding="utf-8") as f:
+        return {
+            entry["fingerprint"]: os.path.join(directory, entry["index"])
+            for entry in json.load(f) if "fingerprint" in entry
+        }
+
+
+def write_partitions(
+    directory: str, records: list[dict], vectors: dict[str, np.ndarray], previous_directory: str | None = None
+) -> PartitionsWritten:
+    """
+    Write one sub-index per (document, jurisdiction, year) into `directory`,
+    beside the main index, and list them in partitions.json. Sub-indexes use
+    the same row ids as the main index. With a single partition nothing is
+    written, as the main index already is it.
+
+    Partitions whose rows and chunks are unchanged since the snapshot in
+    `previous_directory` are linked (or copied) from it rather than rebuilt.
+    Pass it only when its vectors are still valid, i.e. for an incremental
+    ingest with the same embedding model.
+    """
+    groups: dict[tuple, list[dict]] = {}
+    for record in records:
+        groups.setdefault(tuple(record[field] for field in PARTITION_FIELDS), []).append(record)
+    if len(groups) < 2:
+        return PartitionsWritten(0, 0)
+
+    previous = _previous_partitions(previous_directory)
+    os.makedirs(os.path.join(directory, PARTITIONS_DIR))
+    manifest, rebuilt = [], 0
+    for i, (key, members) in enumerate(sorted(groups.items(), key=lambda item: str(item[0]))):
+        path = os.path.join(PARTITIONS_DIR, f"{i:04}.faiss")
+        fingerprint = _fingerprint(members)
+
+        if fingerprint in previous:
+            _link_or_copy(previous[fingerprint], os.path.join(directory, path))
+        else:
+            index = build_index(
+                np.stack([vectors[r["chunk_hash"]] for r in members]),
+                np.array([r["row_id"] for r in members], dtype="int64"),
+            )
+            faiss.write_index(index, os.path.join(directory, path))
+            rebuilt += 1
+
+        manifest.append({
+            **dict(zip(PARTITION_FIELDS, key)), "index": path, "rows": len(members), "fingerprint": fingerprint,
+        })
+
+    with open(os.path.join(directory, PARTITIONS_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return PartitionsWritten(len(manifest), rebuilt)
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    # Snapshot files are never modified after publishing, so a hard link is safe to share
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class FilteredSearch:
+    """
+    Vector search over the main index, restricted by a `RetrievalFilter`.
+
+    When ingest published partition sub-indexes next to the index, a filter
+    searches only the partitions it matches, so its cost follows the size
+    of those partitions rather than of the whole corpus or the number of
+    partitions. Indexes without them (single-partition corpora, older
+    snapshots) are searched whole with an IDSelector over the rows the
+    metadata store matches.
+    """
+
+    def __init__(self, index, index_path: str, metadata, io_flags: int = 0):
+        self.index = index
+        self.partitions: list[tuple[dict, object]] = []
+
+        directory = os.path.dirname(index_path)
+        manifest_path = os.path.join(directory, PARTITIONS_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                for entry in json.load(f):
+                    sub_index = faiss.read_index(os.path.join(directory, entry["index"]), io_flags)
+                    configure_search(sub_index)
+                    self.partitions.append((entry, sub_index))
+            logger.info("Loaded %d partition sub-indexes", len(self.partitions))
+
+        # Filters repeat across requests; the partitions and row ids they select are cached
+        self._matching = lru_cache(maxsize=64)(self._match_partitions)
+        self._row_ids = lru_cache(maxsize=64)(metadata.row_ids)
+
+    def _match_partitions(self, filters: RetrievalFilter) -> list:
+        return [sub_index for entry, sub_index in self.partitions if filters.matches(entry)]
+
+    def search(self, query_vecs, k: int, filters: RetrievalFilter | None = None):
+        if filters is None or not filters.conditions():
+            return self.index.search(query_vecs, k)
+
+        if self.partitions:
+            matching = self._matching(filters)
+            if len(matching) == len(self.partitions):
+                return self.index.search(query_vecs, k)
+            if len(matching) == 1:
+                return matching[0].search(query_vecs, k)
+            results = [sub_index.search(query_vecs, min(k, sub_index.ntotal)) for sub_index in matching]
+            return _merge(results, k, len(query_vecs))
+
+        row_ids = self._row_ids(filters)
+        if len(row_ids) == self.index.ntotal:
+            return self.index.search(query_vecs, k)
+        if not row_ids:
+            return _merge([], k, len(query_vecs))
+
+        selector = faiss.IDSelectorBatch(np.array(row_ids, dtype="int64"))
+        return self.index.search(query_vecs, k, params=search_params(self.index, selector))
+
+
+def _merge(results: list[tuple[np.ndarray, np.ndarray]], k: int, n_queries: int):
+    """Best `k` (score, id) per query across several searches of the same queries."""
+    if not results:
+        return np.empty((n_queries, 0), dtype="float32"), np.empty((n_queries, 0), dtype="int64")
+
+    scores = np.hstack([s for s, _ in results])
+    ids = np.hstack([i for _, i in results])
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
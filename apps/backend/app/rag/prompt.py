@@ -1,29 +1,107 @@
+import logging
+import math
+
+from app.core.config import get_settings
+from app.core.metrics import record_tokens_saved
 from app.schemas.chat import ToolAnswer, Section
 
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+# The best chunk is kept, truncated to at least this much, even over budget
+MIN_CONTEXT_TOKENS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about 4 characters per token for English), without a tokenizer call."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _chunk_text(c) -> tuple[str, str]:
+    # Handle both dict and Section object
+    if isinstance(c, Section):
+        return c.section, c.text
+    return c['section'], c['text']
+
 
 def build_context(chunks):
     context_parts = []
     for c in chunks:
-        # Handle both dict and Section object
-        if isinstance(c, Section):
-            section_name = c.section
-            text = c.text
-        else:
-            section_name = c['section']
-            text = c['text']
-
+        section_name, text = _chunk_text(c)
         context_parts.append(f"[Section: {section_name}]\n{text}")
 
     return "\n\n".join(context_parts)
 
 
+def dedupe_chunks(chunks):
+    """
+    Best-first chunks without repeats: a chunk whose text equals, or is
+    contained in, a higher-ranked chunk adds nothing to the context.
+    """
+    if all(isinstance(c, dict) and "score" in c for c in chunks):
+        chunks = sorted(chunks, key=lambda c: c["score"], reverse=True)
+
+    kept, seen = [], []
+    for c in chunks:
+        text = " ".join(_chunk_text(c)[1].split())
+        if any(text in other for other in seen):
+            continue
+        kept.append(c)
+        seen.append(text)
+    return kept
+
+
+def _truncate(c, max_tokens: int):
+    text = _chunk_text(c)[1][:max_tokens * CHARS_PER_TOKEN]
+    if isinstance(c, Section):
+        return c.model_copy(update={"text": text})
+    return {**c, "text": text}
+
+
+def fit_chunks(chunks, budget: int):
+    """The longest best-first prefix of `chunks` whose context fits in `budget` tokens."""
+    kept, used = [], 0
+    for c in chunks:
+        cost = estimate_tokens(build_context([c])) + 1
+        if used + cost > budget:
+            if not kept:
+                kept.append(_truncate(c, max(budget, MIN_CONTEXT_TOKENS)))
+            break
+        kept.append(c)
+        used += cost
+    return kept
+
+
+def build_budgeted_prompt(chunks, question: str, tool_result: ToolAnswer | None = None, chat_history: str = "") -> str:
+    """
+    `build_prompt` held to PROMPT_TOKEN_BUDGET.
+
+    The instructions, tool result and history are always included; the
+    context gets what is left, filled with deduplicated chunks in relevance
+    order.
+    """
+    overhead = estimate_tokens(build_prompt("", question, tool_result, chat_history))
+    kept = fit_chunks(dedupe_chunks(chunks), get_settings().PROMPT_TOKEN_BUDGET - overhead)
+    context = build_context(kept)
+
+    saved = estimate_tokens(build_context(chunks)) - estimate_tokens(context)
+    if saved > 0:
+        logger.info(
+            "Prompt context trimmed: %d of %d chunks kept, %d tokens saved", len(kept), len(chunks), saved
+        )
+    record_tokens_saved("context", saved)
+
+    return build_prompt(context, question, tool_result, chat_history)
+
+
 def build_prompt(context: str, question: str, tool_result: ToolAnswer | None = None, chat_history: str = "") -> str:
     tool_section = ""
 
     if tool_result:
+        # The tool's sections are already in the context
         tool_section = f"""
         The following information was computed using deterministic CRA rules:
-        {tool_result}
+        {tool_result.model_dump(exclude={"sections"})}
 
         Use this result when answering the question.
         """
@@ -1,29 +1,242 @@
-import json
+import asyncio
 import logging
+import os
 
 import faiss
-from app.rag.ingest import embed_query
+import numpy as np
+from app.core.config import get_settings
+from app.core.metrics import timed
+from app.rag.index_factory import configure_search, index_kind
+from app.rag.ingest import embed_queries, embed_queries_async, embed_query, embed_query_async
+from app.rag.lexical import is_strong_match, reciprocal_rank_fusion, tokenize
+from app.rag.metadata_store import MetadataStore
+from app.rag.partitions import FilteredSearch, RetrievalFilter
 
 logger = logging.getLogger(__name__)
 
 
+class RetrievalContext:
+    """
+    Retrieval results for a single request.
+
+    The question is embedded and searched once, then the same context is
+    handed to the agent and its tools. Call `top(k)` to reuse the hits; asking
+    for more than were fetched re-runs only the index searches with the stored
+    question vector, never the embedding call. `query_vec` is None when the
+    lexical fast path answered the question without embedding it. `filters`
+    restricts re-ranking to the same metadata as the first search.
+    """
+
+    def __init__(
+        self,
+        retriever: "FaissRetriever",
+        question: str,
+        query_vec,
+        hits: list[dict],
+        top_k: int,
+        filters: RetrievalFilter | None = None,
+    ):
+        self.retriever = retriever
+        self.question = question
+        self.query_vec = query_vec
+        self.hits = hits
+        self.top_k = top_k
+        self.filters = filters
+
+    def top(self, top_k: int | None = None) -> list[dict]:
+        if top_k is None:
+            return self.hits
+
+        if top_k > self.top_k:
+            self.hits = self.retriever.rank(self.question, self.query_vec, top_k, self.filters)
+            self.top_k = top_k
+
+        return self.hits[:top_k]
+
+
 class FaissRetriever:
-    def __init__(self, index_path: str, metadata_path: str, client):
-        self.index = faiss.read_index(index_path)
+    def __init__(self, index_path: str, metadata_path: str, client, version: str | None = None):
+        mmap = get_settings().INDEX_MMAP
+        # IO_FLAG_MMAP_IFC maps vector codes and IVF lists read-only from the file
+        # instead of copying them into this process
+        io_flags = faiss.IO_FLAG_MMAP_IFC if mmap else 0
+        self.index = faiss.read_index(index_path, io_flags)
+        configure_search(self.index)
+        logger.info(
+            "Loaded %s index with %d vectors%s",
+            index_kind(self.index), self.index.ntotal, " (memory-mapped)" if mmap else "",
+        )
 
-        with open(metadata_path, "r", encoding="utf-8") as f:
-            self.metadata = json.load(f)
+        # Changes whenever ingest publishes a new index; caches keyed on it reset
+        if version is None:
+            stat = os.stat(index_path)
+            version = f"{stat.st_mtime_ns}-{stat.st_size}"
+        self.version = version
+
+        self.metadata = MetadataStore(metadata_path, mmap=mmap)
 
         assert self.index.ntotal == len(self.metadata)
+        self.filtered = FilteredSearch(self.index, index_path, self.metadata, io_flags)
         self.client = client
 
-    def search(self, query: str, top_k: int = 5):
-        query_vec = embed_query(query, self.client)
-        scores, indices = self.index.search(query_vec, top_k)
+    def warm_up(self) -> None:
+        """Touch the index and metadata once so the first real search does not pay for cold pages."""
+        self.index.search(np.zeros((1, self.index.d), dtype="float32"), 1)
+        self.metadata.lexical_search(tokenize("tfsa contribution"), 1)
+
+    def embed(self, query: str):
+        with timed("embed"):
+            return embed_query(query, self.client)
+
+    def search_by_vector(self, query_vec, top_k: int = 5, filters: RetrievalFilter | None = None):
+        ranking = self._vector_rankings(query_vec, top_k, filters)[0]
+        rows = self.metadata.get_many(list(ranking))
+
+        return [{"score": score, **rows[row_id]} for row_id, score in ranking.items()]
+
+    def rank(self, question: str, query_vec, top_k: int = 5, filters: RetrievalFilter | None = None):
+        """
+        Fuse vector and BM25 rankings with reciprocal rank fusion.
+
+        Each side contributes a deeper candidate list than `top_k` so a chunk
+        ranked moderately by both can beat one ranked highly by only one.
+        Without a query vector only the lexical ranking is used. Both sides
+        only see chunks matching `filters`.
+        """
+        vector_scores = None
+        if query_vec is not None:
+            vector_scores = self._vector_rankings(query_vec, top_k * 4, filters)[0]
+        return self._fuse(question, vector_scores, top_k, filters)
+
+    def _vector_rankings(self, query_vecs, k: int, filters: RetrievalFilter | None = None) -> list[dict[int, float]]:
+        """One FAISS search over all rows of `query_vecs`; row id -> score per query."""
+        with timed("vector_search"):
+            scores, indices = self.filtered.search(query_vecs, k, filters)
+        return [
+            {int(i): float(s) for s, i in zip(row_scores, row_indices) if i != -1}
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+
+    def _fuse(
+        self,
+        question: str,
+        vector_scores: dict[int, float] | None,
+        top_k: int,
+        filters: RetrievalFilter | None = None,
+    ):
+        settings = get_settings()
+
+        if vector_scores is not None and not settings.HYBRID_SEARCH_ENABLED:
+            top = list(vector_scores.items())[:top_k]
+            rows = self.metadata.get_many([row_id for row_id, _ in top])
+            return [{"score": score, **rows[row_id]} for row_id, score in top]
+
+        rankings = [] if vector_scores is None else [list(vector_scores)]
+        with timed("lexical_search"):
+            lexical_scores = dict(self.metadata.lexical_search(tokenize(question), top_k * 4, filters))
+        rankings.append(list(lexical_scores))
+
+        fused = list(reciprocal_rank_fusion(rankings, settings.RRF_K).items())[:top_k]
+        rows = self.metadata.get_many([row_id for row_id, _ in fused])
+
+        return [
+            {
+                "score": score,
+                "vector_score": (vector_scores or {}).get(row_id),
+                "lexical_score": lexical_scores.get(row_id),
+                **rows[row_id],
+            }
+            for row_id, score in fused
+        ]
+
+    def lexical_fast_path(self, question: str, top_k: int = 5, filters: RetrievalFilter | None = None):
+        """BM25 hits when they clearly answer the question on their own, else None."""
+        settings = get_settings()
+        if not settings.LEXICAL_FAST_PATH_ENABLED:
+            return None
+
+        tokens = tokenize(question)
+        with timed("lexical_search"):
+            lexical = self.metadata.lexical_search(tokens, top_k, filters)
+        if not lexical:
+            return None
+
+        rows = self.metadata.get_many([row_id for row_id, _ in lexical])
+        hits = [{"score": score, "lexical_score": score, **rows[row_id]} for row_id, score in lexical]
+
+        if not is_strong_match(tokens, hits[0], settings.LEXICAL_FAST_PATH_MAX_TERMS):
+            return None
+
+        logger.info("Strong keyword match; skipping query embedding.")
+        return hits
+
+    def search(self, query: str | list[str], top_k: int = 5, filters: RetrievalFilter | None = None):
+        """Hits for one query, or a list of hit lists when given a list of queries."""
+        if isinstance(query, list):
+            return [context.hits for context in self.retrieve_batch(query, top_k, filters)]
+        return self.retrieve(query, top_k, filters).hits
+
+    def retrieve(self, question: str, top_k: int = 5, filters: RetrievalFilter | None = None) -> RetrievalContext:
+        hits = self.lexical_fast_path(question, top_k, filters)
+        if hits is not None:
+            return RetrievalContext(self, question, None, hits, top_k, filters)
+
+        query_vec = self.embed(question)
+        hits = self.rank(question, query_vec, top_k, filters)
+        return RetrievalContext(self, question, query_vec, hits, top_k, filters)
+
+    async def aretrieve(
+        self, question: str, top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> RetrievalContext:
+        """Async `retrieve`: awaits the embedding call and runs index searches off the event loop."""
+        hits = await asyncio.to_thread(self.lexical_fast_path, question, top_k, filters)
+        if hits is not None:
+            return RetrievalContext(self, question, None, hits, top_k, filters)
+
+        with timed("embed"):
+            query_vec = await embed_query_async(question, self.client)
+        hits = await asyncio.to_thread(self.rank, question, query_vec, top_k, filters)
+        return RetrievalContext(self, question, query_vec, hits, top_k, filters)
+
+    def retrieve_batch(
+        self, questions: list[str], top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> list[RetrievalContext]:
+        """
+        Retrieve for many questions at once, returning contexts in input order.
+
+        Questions not settled by the lexical fast path are embedded together
+        and searched with a single multi-query FAISS call.
+        """
+        contexts, pending = self._lexical_batch(questions, top_k, filters)
+        if pending:
+            with timed("embed"):
+                query_vecs = embed_queries([questions[i] for i in pending], self.client)
+            self._rank_batch(questions, contexts, pending, query_vecs, top_k, filters)
+        return contexts
+
+    async def aretrieve_batch(
+        self, questions: list[str], top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> list[RetrievalContext]:
+        contexts, pending = await asyncio.to_thread(self._lexical_batch, questions, top_k, filters)
+        if pending:
+            with timed("embed"):
+                query_vecs = await embed_queries_async([questions[i] for i in pending], self.client)
+            await asyncio.to_thread(self._rank_batch, questions, contexts, pending, query_vecs, top_k, filters)
+        return contexts
+
+    def _lexical_batch(self, questions: list[str], top_k: int, filters: RetrievalFilter | None = None):
+        contexts: list[RetrievalContext | None] = [None] * len(questions)
+        pending = []
+        for i, question in enumerate(questions):
+            hits = self.lexical_fast_path(question, top_k, filters)
+            if hits is None:
+                pending.append(i)
+            else:
+                contexts[i] = RetrievalContext(self, question, None, hits, top_k, filters)
+        return contexts, pending
 
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx == -1:
-                continue
-            results.append({"score": float(score), **self.metadata[idx]})
-        return results
+    def _rank_batch(self, questions, contexts, pending, query_vecs, top_k: int, filters: RetrievalFilter | None = None) -> None:
+        rankings = self._vector_rankings(query_vecs, top_k * 4, filters)
+        for i, query_vec, vector_scores in zip(pending, query_vecs, rankings):
+            hits = self._fuse(questions[i], vector_scores, top_k, filters)
+            contexts[i] = RetrievalContext(self, questions[i], query_vec.reshape(1, -1), hits, top_k, filters)
@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIR = "app/embedding"
+SNAPSHOTS_DIR = os.path.join(EMBEDDING_DIR, "snapshots")
+MANIFEST_PATH = os.path.join(EMBEDDING_DIR, "manifest.json")
+
+# Written by ingest before versioned snapshots; served until the first one is published
+LEGACY_INDEX_PATH = os.path.join(EMBEDDING_DIR, "tfsa.faiss")
+LEGACY_METADATA_PATH = os.path.join(EMBEDDING_DIR, "tfsa_metadata.sqlite")
+
+INDEX_FILE = "index.faiss"
+METADATA_FILE = "metadata.sqlite"
+
+
+class Snapshot(NamedTuple):
+    """One published index and metadata store."""
+    version: str
+    index_path: str
+    metadata_path: str
+
+
+def current_snapshot() -> Snapshot:
+    """
+    The snapshot the manifest points at, or the legacy files when nothing
+    has been published yet. Legacy files are versioned by mtime and size so
+    caches keyed on the version still reset when they change.
+    """
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        stat = os.stat(LEGACY_INDEX_PATH)
+        return Snapshot(f"{stat.st_mtime_ns}-{stat.st_size}", LEGACY_INDEX_PATH, LEGACY_METADATA_PATH)
+
+    directory = os.path.join(SNAPSHOTS_DIR, manifest["version"])
+    return Snapshot(
+        manifest["version"],
+        os.path.join(directory, INDEX_FILE),
+        os.path.join(directory, METADATA_FILE),
+    )
+
+
+def new_snapshot() -> Snapshot:
+    """A fresh, unpublished snapshot directory for ingest to write into."""
+    version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:8]}"
+    directory = os.path.join(SNAPSHOTS_DIR, version)
+    os.makedirs(directory)
+    return Snapshot(version, os.path.join(directory, INDEX_FILE), os.path.join(directory, METADATA_FILE))
+
+
+def publish_snapshot(snapshot: Snapshot, keep: int) -> None:
+    """
+    Point the manifest at `snapshot`, then delete all but the `keep` newest
+    snapshots. The manifest is replaced atomically, so a reader sees either
+    the old version or the new one, and workers still serving an older
+    snapshot keep their open files after it is deleted.
+    """
+    tmp_path = f"{MANIFEST_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": snapshot.version, "published_at": time.time()}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, MANIFEST_PATH)
+    logger.info("Published index snapshot %s", snapshot.version)
+
+    # Version names sort by creation time
+    for version in sorted(os.listdir(SNAPSHOTS_DIR))[:-max(keep, 1)]:
+        if version != snapshot.version:
+            shutil.rmtree(os.path.join(SNAPSHOTS_DIR, version), ignore_errors=True)
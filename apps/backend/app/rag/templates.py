@@ -0,0 +1,37 @@
+from app.schemas.chat import CalculationAnswer
+
+
+def _dollars(amount: int) -> str:
+    return f"${amount:,}"
+
+
+def render_calculation_answer(answer: CalculationAnswer) -> str:
+    """
+    Markdown answer for a calculation question, written from the tool result
+    alone: the total, the yearly limits it adds up, the assumptions and the
+    CRA sections attached to the result as sources.
+    """
+    calculation = answer.calculation
+    total = _dollars(calculation.total_contribution_room)
+    years = sorted(calculation.yearly_breakdown)
+
+    lines = [
+        f"Your estimated TFSA contribution room is **{total}**"
+        + (f", accumulated from {years[0]} to {years[-1]}." if years else "."),
+        "",
+        "| Year | Annual limit |",
+        "| --- | ---: |",
+        *(f"| {year} | {_dollars(calculation.yearly_breakdown[year])} |" for year in years),
+        f"| **Total** | **{total}** |",
+        "",
+        "This assumes:",
+        *(f"- {assumption}" for assumption in calculation.assumptions),
+    ]
+
+    sources = list(dict.fromkeys(
+        f"{s.section} ({s.document}, {s.jurisdiction}, {s.year})" for s in answer.sections
+    ))
+    if sources:
+        lines += ["", "Sources:", *(f"- {source}" for source in sources)]
+
+    return "\n".join(lines)
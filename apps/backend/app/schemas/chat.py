@@ -37,4 +37,11 @@ class ToolError(BaseModel):
     type: Literal["error"] = "error"
     message: str
 
-
+class BatchQuestionRequest(BaseModel):
+    questions: List[str] = Field(min_length=1)
+    concurrency: int | None = Field(default=None, ge=1)
+    stream: bool = False
+    # Restrict retrieval to one document, jurisdiction and/or year
+    document: str | None = None
+    jurisdiction: str | None = None
+    year: int | None = None
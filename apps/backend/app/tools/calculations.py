@@ -1,4 +1,7 @@
 from datetime import date
+from functools import lru_cache
+
+import numpy as np
 
 from app.schemas.chat import CalculationToolResult
 
@@ -19,34 +22,140 @@ TFSA_LIMITS = {
     2022: 6000,
     2023: 6500,
     2024: 7000,
-    2025: 7000
+    2025: 7000,
+    2026: 7000,
 }
 
+FIRST_TFSA_YEAR = min(TFSA_LIMITS)
+LAST_PUBLISHED_YEAR = max(TFSA_LIMITS)
+
+
+class LimitTable:
+    """
+    Annual limits from 2009 through `last_year` with their prefix sums, so
+    the room accumulated over any span of years is one subtraction. Years
+    after the last published limit repeat it.
+    """
+
+    def __init__(self, last_year: int):
+        self.last_year = last_year
+        years = range(FIRST_TFSA_YEAR, last_year + 1)
+        self.limits = np.array(
+            [TFSA_LIMITS.get(year, TFSA_LIMITS[LAST_PUBLISHED_YEAR]) for year in years], dtype="int64"
+        )
+        # cumulative[i] is the sum of the first i limits
+        self.cumulative = np.concatenate(([0], np.cumsum(self.limits)))
+
+    def limit(self, year: int) -> int:
+        return int(self.limits[year - FIRST_TFSA_YEAR])
+
+    def accumulated(self, start_year, end_year):
+        """Sum of limits from `start_year` through `end_year`; scalars or arrays."""
+        return (
+            self.cumulative[np.asarray(end_year) - FIRST_TFSA_YEAR + 1]
+            - self.cumulative[np.asarray(start_year) - FIRST_TFSA_YEAR]
+        )
+
+
+@lru_cache(maxsize=8)
+def get_limit_table(last_year: int) -> LimitTable:
+    return LimitTable(last_year)
+
+
+def eligible_from(year_turned_18):
+    """First year with TFSA room: the year turned 18, but no earlier than 2009."""
+    return np.maximum(year_turned_18, FIRST_TFSA_YEAR)
+
+
+def history_matrix(histories: list[dict[int, int]], as_of_year: int | None = None) -> np.ndarray:
+    """
+    Per-year amounts (contributions or withdrawals) as an (n_profiles, n_years)
+    array whose columns are 2009 through `as_of_year`, for `contribution_room_batch`.
+    """
+    as_of_year = as_of_year or date.today().year
+    matrix = np.zeros((len(histories), as_of_year - FIRST_TFSA_YEAR + 1), dtype="int64")
+    for row, history in enumerate(histories):
+        for year, amount in history.items():
+            if FIRST_TFSA_YEAR <= year <= as_of_year:
+                matrix[row, year - FIRST_TFSA_YEAR] += amount
+    return matrix
+
+
+def contribution_room_batch(
+    years_turned_18,
+    contributions: np.ndarray | None = None,
+    withdrawals: np.ndarray | None = None,
+    as_of_year: int | None = None,
+) -> np.ndarray:
+    """
+    Contribution room available in `as_of_year` for many profiles at once.
+
+    `years_turned_18` is one entry per profile; `contributions` and
+    `withdrawals` are (n_profiles, n_years) arrays with columns 2009 through
+    `as_of_year` (see `history_matrix`). Room is every limit since the
+    profile became eligible, less all contributions, plus withdrawals from
+    earlier years: a withdrawal is only added back on January 1 of the next
+    year. Negative room is an over-contribution.
+    """
+    as_of_year = as_of_year or date.today().year
+    start = eligible_from(np.asarray(years_turned_18, dtype="int64"))
+    if (start > as_of_year).any():
+        raise ValueError("year_turned_18 cannot be in the future")
+
+    room = get_limit_table(as_of_year).accumulated(start, as_of_year)
+
+    n_years = as_of_year - FIRST_TFSA_YEAR + 1
+    for name, history in (("contributions", contributions), ("withdrawals", withdrawals)):
+        if history is not None and history.shape != (len(start), n_years):
+            raise ValueError(f"{name} must have shape ({len(start)}, {n_years}), one column per year from 2009")
+
+    if contributions is not None:
+        room = room - contributions.sum(axis=1)
+    if withdrawals is not None:
+        room = room + withdrawals[:, :-1].sum(axis=1)
+    return room
+
+
 """
 Tool: TFSA contribution room Calculator
 """
 def calculate_tfsa_contribution_room(
     year_turned_18: int,
+    contributions: dict[int, int] | None = None,
+    withdrawals: dict[int, int] | None = None,
 ) -> CalculationToolResult:
     current_year = date.today().year
 
     if year_turned_18 > current_year:
         raise ValueError("year_turned_18 cannot be in the future")
-     
-    total = 0
-    yearly_breakdown={}
-
-    for year in range(year_turned_18, current_year+1):
-        amount = TFSA_LIMITS[year]
-        total += amount
-        yearly_breakdown[year] = amount
-    
+
+    table = get_limit_table(current_year)
+    start_year = int(eligible_from(year_turned_18))
+    yearly_breakdown = {year: table.limit(year) for year in range(start_year, current_year + 1)}
+
+    total = contribution_room_batch(
+        [year_turned_18],
+        history_matrix([contributions], current_year) if contributions else None,
+        history_matrix([withdrawals], current_year) if withdrawals else None,
+        as_of_year=current_year,
+    )[0]
+
+    assumptions = ["Canadian resident for all eligible years"]
+    if year_turned_18 < FIRST_TFSA_YEAR:
+        assumptions.append("Room starts in 2009, when TFSAs were introduced")
+    assumptions.append(
+        "Contributions as given, subtracted from room" if contributions else "No prior TFSA contributions"
+    )
+    assumptions.append(
+        "Withdrawals as given, added back to room the following year" if withdrawals else "No withdrawals"
+    )
+    assumptions.append("CRA annual limits used")
+    if current_year > LAST_PUBLISHED_YEAR:
+        assumptions.append(
+            f"Limits after {LAST_PUBLISHED_YEAR} assumed equal to the {LAST_PUBLISHED_YEAR} limit"
+        )
+
     return CalculationToolResult(
-        total_contribution_room=total, 
-        yearly_breakdown=yearly_breakdown, 
-        assumptions=[
-            "Canadian resident for all eligible years",
-            "No prior TFSA contributions",
-            "No withdrawals",
-            "CRA annual limits used"
-        ])
\ No newline at end of file
+        total_contribution_room=int(total),
+        yearly_breakdown=yearly_breakdown,
+        assumptions=assumptions)
@@ -1,13 +1,28 @@
 from typing import List
 
-from app.core.setup import retriever
+from app.core.setup import get_retriever
+from app.rag.partitions import RetrievalFilter
+from app.rag.retriever import RetrievalContext
 from app.schemas.chat import Section
 
-def find_relevant_sections(query: str, top_k: int = 5) -> List[Section]:
+def find_relevant_sections(
+    query: str,
+    top_k: int = 5,
+    retrieval: RetrievalContext | None = None,
+    filters: RetrievalFilter | None = None,
+) -> List[Section]:
     """
     Returns relevant TFSA sections using FAISS.
+
+    Pass the request's `retrieval` context to reuse hits that were already
+    computed for this question instead of embedding and searching again.
+    `filters` (e.g. `RetrievalFilter(year=2025)`) limits a fresh search to
+    matching chunks; a context keeps the filters it was retrieved with.
     """
-    results = retriever.search(query, top_k)
+    if retrieval is not None:
+        results = retrieval.top(top_k)
+    else:
+        results = get_retriever().search(query, top_k, filters)
 
     filtered = []
     for r in results:
@@ -1,4 +1,7 @@
+import base64
 import re
+import uuid
+from datetime import datetime
 
 def chunk_text(text: str):
     pattern = r"\[(.*?)\]"
@@ -27,9 +30,29 @@ def extract_year(question: str) -> int:
     match = re.search(r'\b20\d{2}\b', question)
     return int(match.group()) if match else -1
 
+def is_user_message(msg) -> bool:
+    # sent_by is a MessageSenderType on ORM rows
+    return getattr(msg.sent_by, "value", msg.sent_by) == "user"
+
+def format_message(msg) -> str:
+    sender = "User" if is_user_message(msg) else "Assistant"
+    return f"{sender}: {msg.text}"
+
 def format_chat_history(messages) -> str:
-    formatted_messages = []
-    for msg in messages:
-        sender = "User" if msg.sent_by == "user" else "Assistant"
-        formatted_messages.append(f"{sender}: {msg.text}")
-    return "\n".join(formatted_messages)
+    return "\n".join(format_message(msg) for msg in messages)
+
+def encode_cursor(created_at: datetime, message_id: uuid.UUID) -> str:
+    """Opaque pagination cursor for a message's (created_at, id) position."""
+    raw = f"{created_at.isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """
+    Inverse of `encode_cursor`.
+    Raises ValueError for anything that is not a cursor we issued.
+    """
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(message_id)
+    except (UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+
+BENCHMARK_ENV = {
+    "GEMINI_API_KEY": "benchmark",
+    "GEMINI_GENAI_MODEL": "stub-llm",
+    "GEMINI_EMBEDDING_MODEL": "stub-embedding",
+    "DB_URL": "sqlite:///./benchmark.db",
+    "AUTH0_DOMAIN": "benchmark.invalid",
+    "AUTH0_AUDIENCE": "benchmark",
+}
+
+
+def configure_env():
+    """Fill in settings the app requires so benchmarks run without a .env file."""
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+
+
+def argument_parser(doc: str) -> argparse.ArgumentParser:
+    """Parser for the running benchmark script, with its docstring as the description."""
+    name = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    return argparse.ArgumentParser(
+        prog=f"python -m benchmarks.{name}",
+        description=doc,
+        epilog="Run from apps/backend.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class Table:
+    """Fixed-width report: the first column left-aligned, the rest right-aligned, floats to `digits` places."""
+
+    def __init__(self, *columns: str, first_width: int = 12, digits: int = 2, indent: str = ""):
+        self.widths = [first_width] + [max(len(c) + 2, 8) for c in columns[1:]]
+        self.digits = digits
+        self.indent = indent
+        self._print(columns)
+
+    def row(self, *values):
+        self._print([f"{v:.{self.digits}f}" if isinstance(v, float) else str(v) for v in values])
+
+    def _print(self, cells):
+        first, *rest = cells
+        print(
+            self.indent + f"{first:<{self.widths[0]}}"
+            + "".join(f"{cell:>{width}}" for cell, width in zip(rest, self.widths[1:]))
+        )
@@ -0,0 +1,84 @@
+"""
+Recall@k against the flat baseline, per-query latency, build time and size for
+each INDEX_TYPE on clustered, normalized synthetic vectors.
+"""
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks._common import Table, argument_parser, configure_env, percentile
+
+configure_env()
+
+# pylint: disable=wrong-import-position
+from app.core.config import get_settings
+from app.rag.index_factory import INDEX_TYPES, build_index, configure_search, index_kind
+
+
+def synthetic_corpus(n: int, dimension: int, queries: int, clusters: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimension)).astype("float32")
+
+    def sample(count):
+        points = centres[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dimension))
+        points = points.astype("float32")
+        faiss.normalize_L2(points)
+        return points
+
+    return sample(n), sample(queries)
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nlist", type=int)
+    parser.add_argument("--nprobe", type=int)
+    parser.add_argument("--ef-search", type=int)
+    parser.add_argument("--pq-m", type=int)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    for option, field in (("nlist", "INDEX_NLIST"), ("nprobe", "INDEX_NPROBE"),
+                          ("ef_search", "INDEX_EF_SEARCH"), ("pq_m", "INDEX_PQ_M")):
+        if getattr(args, option) is not None:
+            setattr(settings, field, getattr(args, option))
+
+    corpus, queries = synthetic_corpus(args.vectors, args.dimension, args.queries, args.clusters)
+    ids = np.arange(len(corpus), dtype="int64")
+    faiss.omp_set_num_threads(1)
+
+    truth = None
+    print(f"{args.vectors} vectors, d={args.dimension}, {args.queries} queries")
+    table = Table("index", "build s", f"recall@{args.k}", "p50 ms", "p99 ms", "size MiB", digits=3)
+    for index_type in ["flat"] + [t for t in args.types if t != "flat"]:
+        started = time.perf_counter()
+        index = build_index(corpus, ids, index_type)
+        build_time = time.perf_counter() - started
+        configure_search(index)
+
+        latencies, found = [], []
+        for query in queries:
+            started = time.perf_counter()
+            _, labels = index.search(query.reshape(1, -1), args.k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found.append(labels[0])
+        found = np.array(found)
+
+        if truth is None:
+            truth = found
+        recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+
+        table.row(
+            index_kind(index), build_time, float(recall), percentile(latencies, 50), percentile(latencies, 99),
+            len(faiss.serialize_index(index)) / 2 ** 20,
+        )
+
+
+if __name__ == "__main__":
+    main()
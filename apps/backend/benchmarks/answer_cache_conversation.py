@@ -0,0 +1,80 @@
+"""
+Answer cache hit rate by turn kind over simulated multi-turn chats that mix
+popular questions with follow-ups, each turn carrying its chat history.
+"""
+import random
+from types import SimpleNamespace
+
+from benchmarks._common import Table, argument_parser, configure_env
+
+configure_env()
+
+# pylint: disable=wrong-import-position
+from benchmarks.fake_genai import FakeGenaiClient
+from app.core.config import get_settings
+from app.core.setup import get_retriever
+from app.rag.answer_cache import get_answer_cache
+from app.rag.ask import ask_llm
+from app.rag.history import fit_history
+
+POPULAR = [
+    "What is a TFSA?",
+    "Who can open a TFSA?",
+    "What happens if I over-contribute to my TFSA?",
+    "Can I transfer my TFSA to another financial institution?",
+    "Are TFSA withdrawals taxable?",
+    "Can a non-resident contribute to a TFSA?",
+    "What investments can I hold in a TFSA?",
+    "What happens to my TFSA when I die?",
+]
+FOLLOW_UPS = ["And what about the penalty?", "Is that taxed?", "What if I move abroad?", "Can you explain that again?"]
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--follow-up-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    model = get_settings().GEMINI_GENAI_MODEL
+    client = FakeGenaiClient(embed_delay=0, generate_delay=0)
+    retriever = get_retriever()
+    retriever.client = client
+    cache = get_answer_cache()
+    cache.invalidate()
+
+    # kind -> [turns, answered without a generate call]
+    counts = {kind: [0, 0] for kind in ("first turn", "later turn", "follow-up")}
+    for _ in range(args.chats):
+        messages = []
+        for turn in range(args.turns):
+            if turn and rng.random() < args.follow_up_rate:
+                kind, question = "follow-up", rng.choice(FOLLOW_UPS)
+            else:
+                kind = "later turn" if turn else "first turn"
+                question = POPULAR[min(int(rng.expovariate(0.5)), len(POPULAR) - 1)]
+
+            history = fit_history("", messages)
+            calls = client.stats.generate_calls
+            answer = ask_llm(retriever.retrieve(question), question, client, model, chat_history=history.text)
+
+            counts[kind][0] += 1
+            counts[kind][1] += client.stats.generate_calls == calls
+            messages += [SimpleNamespace(sent_by="user", text=question), SimpleNamespace(sent_by="system", text=answer)]
+
+    table = Table("turn kind", "turns", "cached", "hit rate")
+    for kind, (turns, cached) in counts.items():
+        table.row(kind, turns, cached, cached / turns if turns else 0.0)
+    stats = cache.stats()
+    first_turn_hits = counts["first turn"][1]
+    print(
+        f"\ncache lookups={stats['hits'] + stats['misses']} hits={stats['hits']} hit_rate={stats['hit_rate']:.2f}; "
+        f"of all turns {stats['hits'] / sum(t for t, _ in counts.values()):.2f} "
+        f"(first turns only, as before: {first_turn_hits / sum(t for t, _ in counts.values()):.2f})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Chat requests one worker holds open: sync handlers on Starlette's 40-thread pool
+vs every request on one event loop with the async genai client.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import argument_parser, configure_env, percentile
+
+configure_env()
+
+# pylint: disable=wrong-import-position
+from benchmarks.fake_genai import FakeGenaiClient
+from app.core.config import get_settings
+from app.core.setup import get_retriever
+from app.rag.ask import ask_llm, ask_llm_async
+
+STARLETTE_THREADPOOL_SIZE = 40
+
+
+def _questions(n: int, run: str) -> list[str]:
+    # Distinct questions so the embedding cache does not hide upstream calls
+    return [f"What are the TFSA rules for transfers ({run} #{i})?" for i in range(n)]
+
+
+def run_sync(n: int, retriever, client: FakeGenaiClient, model: str) -> list[float]:
+    def handle(question: str) -> float:
+        started = time.perf_counter()
+        retrieval = retriever.retrieve(question)
+        ask_llm(retrieval, question, client, model)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=STARLETTE_THREADPOOL_SIZE) as pool:
+        return list(pool.map(handle, _questions(n, "sync")))
+
+
+async def run_async(n: int, retriever, client: FakeGenaiClient, model: str) -> list[float]:
+    async def handle(question: str) -> float:
+        started = time.perf_counter()
+        retrieval = await retriever.aretrieve(question)
+        await ask_llm_async(retrieval, question, client, model)
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(handle(q) for q in _questions(n, "async")))
+
+
+def report(name: str, latencies: list[float], elapsed: float, client: FakeGenaiClient):
+    print(
+        f"{name:<6} requests={len(latencies):<5} wall={elapsed:6.2f}s "
+        f"throughput={len(latencies) / elapsed:7.1f} req/s "
+        f"p50={percentile(latencies, 50):5.2f}s p95={percentile(latencies, 95):5.2f}s "
+        f"peak_open_upstream_calls={client.stats.peak_in_flight}"
+    )
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--embed-delay", type=float, default=0.05)
+    parser.add_argument("--generate-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    model = get_settings().GEMINI_GENAI_MODEL
+    retriever = get_retriever()
+
+    for name in ("sync", "async"):
+        client = FakeGenaiClient(embed_delay=args.embed_delay, generate_delay=args.generate_delay)
+        retriever.client = client
+
+        started = time.perf_counter()
+        if name == "sync":
+            latencies = run_sync(args.requests, retriever, client, model)
+        else:
+            latencies = asyncio.run(run_async(args.requests, retriever, client, model))
+        report(name, latencies, time.perf_counter() - started, client)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+CPU per request for access token verification with and without the claims
+cache, against a local tenant, and JWKS refreshes after a signing key rotation.
+"""
+import asyncio
+import time
+
+from benchmarks._common import argument_parser, configure_env
+
+configure_env()
+
+# pylint: disable=wrong-import-position
+from authlib.jose import JsonWebKey, jwt
+from fastapi_plugin.fast_api_client import Auth0FastAPI
+
+from app.core.config import get_settings
+from app.core.setup import configure_auth0
+
+
+class LocalAuth0:
+    """Discovery, JWKS and token issuing for a fake tenant, with rotatable keys."""
+
+    def __init__(self, domain: str, audience: str):
+        self.issuer = f"https://{domain}/"
+        self.audience = audience
+        self.jwks_uri = f"{self.issuer}.well-known/jwks.json"
+        self.keys = []
+        self.fetches = 0
+        self.rotate()
+
+    def rotate(self):
+        self.keys.append(
+            JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": f"key-{len(self.keys)}"})
+        )
+
+    def token(self, sub: str, lifetime: int = 3600) -> str:
+        key = self.keys[-1]
+        now = int(time.time())
+        claims = {"iss": self.issuer, "aud": self.audience, "sub": sub, "iat": now, "exp": now + lifetime}
+        return jwt.encode({"alg": "RS256", "kid": key.kid}, claims, key).decode("ascii")
+
+    async def fetch(self, url: str) -> dict:
+        self.fetches += 1
+        if url == self.jwks_uri:
+            return {"keys": [key.as_dict(is_private=False) for key in self.keys]}
+        return {"issuer": self.issuer, "jwks_uri": self.jwks_uri}
+
+
+async def verify_all(api_client, tokens: list[str], deps_per_request: int) -> float:
+    started = time.process_time()
+    for token in tokens:
+        for _ in range(deps_per_request):
+            claims = await api_client.verify_request(
+                headers={"authorization": f"Bearer {token}"}, http_method="GET", http_url="http://benchmark/chat/chats"
+            )
+            assert claims["sub"]
+    return time.process_time() - started
+
+
+async def run(args):
+    settings = get_settings()
+    tenant = LocalAuth0(settings.AUTH0_DOMAIN, settings.AUTH0_AUDIENCE)
+    user_tokens = [tenant.token(f"user-{i}") for i in range(args.users)]
+    tokens = [user_tokens[i % args.users] for i in range(args.requests)]
+    verifications = args.requests * args.deps_per_request
+
+    uncached = Auth0FastAPI(domain=settings.AUTH0_DOMAIN, audience=settings.AUTH0_AUDIENCE, custom_fetch=tenant.fetch)
+    cpu = await verify_all(uncached.api_client, tokens, args.deps_per_request)
+    print(f"uncached: verifications={verifications} cpu={cpu:.2f}s ({cpu / args.requests * 1000:.3f} ms/request)")
+
+    tenant.fetches = 0
+    cached = configure_auth0(custom_fetch=tenant.fetch)
+    cpu = await verify_all(cached.api_client, tokens, args.deps_per_request)
+    stats = cached.api_client.stats()
+    print(
+        f"cached:   verifications={verifications} cpu={cpu:.2f}s ({cpu / args.requests * 1000:.3f} ms/request) "
+        f"signature_checks={stats['misses']} auth0_fetches={tenant.fetches}"
+    )
+
+    tenant.rotate()
+    await verify_all(cached.api_client, [tenant.token("rotated-user")], 1)
+    print(
+        f"rotation: new key accepted after {cached.api_client.jwks_cache.refreshes} forced JWKS refresh, "
+        f"auth0_fetches={tenant.fetches}"
+    )
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--deps-per-request", type=int, default=2)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
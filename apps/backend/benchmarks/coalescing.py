@@ -0,0 +1,77 @@
+"""
+Upstream embed and generate calls, and latency, for a cold spike of
+`--requests` questions drawn from `--distinct` ones, with and without
+single-flight coalescing on the sync and async paths.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import Table, argument_parser, configure_env, percentile
+
+configure_env()
+
+# pylint: disable=wrong-import-position
+from benchmarks.async_pipeline_load import STARLETTE_THREADPOOL_SIZE
+from benchmarks.fake_genai import FakeGenaiClient
+from app.core.config import get_settings
+from app.core.setup import get_retriever
+from app.llm.coalesce import CoalescingClient
+from app.rag.ask import ask_llm, ask_llm_async
+
+
+def spike(n: int, distinct: int, run: str) -> list[str]:
+    return [f"What are the TFSA rules for transfers ({run} topic {i % distinct})?" for i in range(n)]
+
+
+def run_sync(questions: list[str], retriever, client, model: str) -> list[float]:
+    def handle(question: str) -> float:
+        started = time.perf_counter()
+        ask_llm(retriever.retrieve(question), question, client, model)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=STARLETTE_THREADPOOL_SIZE) as pool:
+        return list(pool.map(handle, questions))
+
+
+async def run_async(questions: list[str], retriever, client, model: str) -> list[float]:
+    async def handle(question: str) -> float:
+        started = time.perf_counter()
+        await ask_llm_async(await retriever.aretrieve(question), question, client, model)
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(handle(q) for q in questions))
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=5)
+    parser.add_argument("--embed-delay", type=float, default=0.1)
+    parser.add_argument("--generate-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    model = get_settings().GEMINI_GENAI_MODEL
+    retriever = get_retriever()
+
+    table = Table("path", "coalescing", "embed calls", "generate calls", "coalesced", "p50 s", "p99 s", first_width=6)
+    for path in ("sync", "async"):
+        for coalescing in (False, True):
+            upstream = FakeGenaiClient(embed_delay=args.embed_delay, generate_delay=args.generate_delay)
+            client = CoalescingClient(upstream) if coalescing else upstream
+            retriever.client = client
+
+            questions = spike(args.requests, args.distinct, f"{path} {coalescing}")
+            if path == "sync":
+                latencies = run_sync(questions, retriever, client, model)
+            else:
+                latencies = asyncio.run(run_async(questions, retriever, client, model))
+
+            table.row(
+                path, str(coalescing).lower(), upstream.stats.embed_calls, upstream.stats.generate_calls,
+                client.stats()["coalesced"] if coalescing else 0, percentile(latencies, 50), percentile(latencies, 99),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Portfolio-wide TFSA room: a per-profile year-by-year loop vs one
+`contribution_room_batch` call, checked to agree.
+"""
+import time
+
+import numpy as np
+
+from benchmarks._common import argument_parser, configure_env
+
+configure_env()
+
+# pylint: disable=wrong-import-position
+from app.tools.calculations import FIRST_TFSA_YEAR, contribution_room_batch, get_limit_table
+
+
+def random_portfolio(n: int, as_of_year: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    n_years = as_of_year - FIRST_TFSA_YEAR + 1
+    years_turned_18 = rng.integers(1960, as_of_year + 1, n)
+
+    eligible = np.arange(FIRST_TFSA_YEAR, as_of_year + 1) >= np.maximum(years_turned_18, FIRST_TFSA_YEAR)[:, None]
+    contributions = rng.integers(0, 8, (n, n_years)) * 1000 * eligible
+    withdrawals = rng.integers(0, 3, (n, n_years)) * 1000 * eligible
+    return years_turned_18, contributions, withdrawals
+
+
+def loop_room(years_turned_18, contributions, withdrawals, as_of_year: int) -> list[int]:
+    table = get_limit_table(as_of_year)
+    rooms = []
+    for year_turned_18, contributed, withdrawn in zip(years_turned_18.tolist(), contributions, withdrawals):
+        room = 0
+        for year in range(max(year_turned_18, FIRST_TFSA_YEAR), as_of_year + 1):
+            column = year - FIRST_TFSA_YEAR
+            room += table.limit(year) - int(contributed[column])
+            if year < as_of_year:
+                room += int(withdrawn[column])
+        rooms.append(room)
+    return rooms
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--profiles", type=int, default=100000)
+    parser.add_argument("--as-of-year", type=int, default=2026)
+    args = parser.parse_args()
+
+    portfolio = random_portfolio(args.profiles, args.as_of_year)
+
+    started = time.perf_counter()
+    expected = loop_room(*portfolio, args.as_of_year)
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rooms = contribution_room_batch(*portfolio, as_of_year=args.as_of_year)
+    batch_seconds = time.perf_counter() - started
+
+    assert rooms.tolist() == expected
+    print(
+        f"profiles={args.profiles} loop={loop_seconds * 1000:.1f}ms batch={batch_seconds * 1000:.1f}ms "
+        f"speedup={loop_seconds / batch_seconds:.0f}x over_contributed={(rooms < 0).sum()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Pool checkouts, SQL statements, commits and database time per request for each
+chat endpoint, then the peak connections checked out with `--concurrency`
+messages in flight. "Held" time includes any LLM call made while holding a
+connection. Set DB_URL to use Postgres instead of a temp SQLite file.
+"""
+import asyncio
+import time
+from collections import Counter
+
+from sqlalchemy import event
+
+from benchmarks._common import Table, argument_parser, percentile
+from benchmarks.rag_pipeline import (
+    benchmark_client,
+    build_corpus,
+    fastapi_app,
+    install,
+    stub_auth,
+)
+
+from benchmarks.fake_genai import FakeGenaiClient
+from app.core.config import get_settings
+from app.core.db import async_engine, engine
+
+
+def questions(n: int, run: str) -> list[str]:
+    # Retrieval-only questions: this measures the database, not the tools
+    return [f"How do transfers between TFSAs work ({run} #{i})?" for i in range(n)]
+
+
+class DbCounters:
+    """Pool and cursor events from both engines, summed until `reset`."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.db_seconds = 0.0
+        self.held_seconds = 0.0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+
+        for sync_engine in (engine, async_engine.sync_engine):
+            event.listen(sync_engine.pool, "checkout", self._checkout)
+            event.listen(sync_engine.pool, "checkin", self._checkin)
+            event.listen(sync_engine, "before_cursor_execute", self._before_execute)
+            event.listen(sync_engine, "after_cursor_execute", self._after_execute)
+            event.listen(sync_engine, "commit", self._commit)
+
+    def reset(self):
+        self.counts.clear()
+        self.db_seconds = 0.0
+        self.held_seconds = 0.0
+        self.peak_checked_out = self.checked_out
+
+    def _checkout(self, _dbapi_conn, record, _proxy):
+        record.info["checked_out_at"] = time.perf_counter()
+        self.counts["checkouts"] += 1
+        self.checked_out += 1
+        self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _checkin(self, _dbapi_conn, record):
+        self.held_seconds += time.perf_counter() - record.info.pop("checked_out_at")
+        self.checked_out -= 1
+
+    def _before_execute(self, conn, *_):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, *_):
+        self.db_seconds += time.perf_counter() - conn.info["query_started"].pop()
+        self.counts["statements"] += 1
+
+    def _commit(self, *_):
+        self.counts["commits"] += 1
+
+
+async def run_sequential(http, counters: DbCounters, chat_id: str, n: int):
+    endpoints = {
+        "GET /chat/chats": lambda i: http.get("/chat/chats"),
+        "POST /chat/{id}/message": lambda i: http.post(
+            f"/chat/{chat_id}/message", params={"question": questions(n, "sequential")[i]}
+        ),
+        "GET /chat/{id}/messages": lambda i: http.get(f"/chat/{chat_id}/messages"),
+    }
+
+    table = Table("endpoint", "checkouts", "statements", "commits", "db p50 ms", "db p95 ms", "held p50 ms",
+                  first_width=26)
+    for name, send in endpoints.items():
+        totals, db_times, held_times = Counter(), [], []
+        for i in range(n):
+            counters.reset()
+            response = await send(i)
+            response.raise_for_status()
+            totals.update(counters.counts)
+            db_times.append(counters.db_seconds * 1000)
+            held_times.append(counters.held_seconds * 1000)
+
+        table.row(
+            name, totals["checkouts"] / n, totals["statements"] / n, totals["commits"] / n,
+            percentile(db_times, 50), percentile(db_times, 95), percentile(held_times, 50),
+        )
+
+
+async def run_concurrent(http, counters: DbCounters, chat_ids: list[str], n: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(i: int, question: str):
+        async with semaphore:
+            response = await http.post(f"/chat/{chat_ids[i % len(chat_ids)]}/message", params={"question": question})
+            response.raise_for_status()
+
+    counters.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i, q) for i, q in enumerate(questions(n, "concurrent"))))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"\nconcurrent: requests={n} concurrency={concurrency} throughput={n / elapsed:.1f} req/s "
+        f"checkouts/request={counters.counts['checkouts'] / n:.2f} "
+        f"peak_connections_checked_out={counters.peak_checked_out} "
+        f"db_time/request={counters.db_seconds * 1000 / n:.2f}ms "
+        f"connection_held/request={counters.held_seconds * 1000 / n:.2f}ms"
+    )
+
+
+async def run(args):
+    stub_auth()
+    counters = DbCounters()
+
+    async with fastapi_app.router.lifespan_context(fastapi_app):
+        async with benchmark_client() as http:
+            chat_ids = []
+            for i in range(args.concurrency):
+                response = await http.post("/chat/create", params={"chat_title": f"db load {i}"})
+                chat_ids.append(response.json()["chat"]["id"])
+
+            await run_sequential(http, counters, chat_ids[0], args.requests)
+            await run_concurrent(http, counters, chat_ids, args.requests, args.concurrency)
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--generate-delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"db={get_settings().DB_URL}")
+    client = FakeGenaiClient(embed_delay=0, generate_delay=args.generate_delay)
+    install(build_corpus(1, client), client)
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
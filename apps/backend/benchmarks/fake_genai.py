@@ -0,0 +1,168 @@
+"""
+Local stand-in for `google.genai.Client` used by the benchmarks.
+
+Embeddings are derived from a hash of the text, so the same input always maps
+to the same unit vector, and every call sleeps for a configurable delay to
+mimic network latency. Both `client.models` and `client.aio.models` are
+provided so sync and async code paths can be exercised against the same stub.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from google.genai import errors
+
+DEFAULT_DIMENSION = 3072
+
+
+def fake_embedding(text: str, dimension: int = DEFAULT_DIMENSION) -> list[float]:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype("float32")
+    vector /= np.linalg.norm(vector)
+    return vector.tolist()
+
+
+def fake_answer(contents) -> str:
+    digest = hashlib.sha256(str(contents).encode("utf-8")).hexdigest()[:12]
+    return f"Stub answer {digest}. Sources: RC4466 - TFSA Guide"
+
+
+def rate_limit_error() -> errors.ClientError:
+    return errors.ClientError(
+        429, {"error": {"code": 429, "message": "Resource has been exhausted", "status": "RESOURCE_EXHAUSTED"}}
+    )
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.embed_calls = 0
+        self.checked_embed_calls = 0
+        self.embedded_texts = 0
+        self.rate_limited = 0
+        self.generate_calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def enter(self, kind: str):
+        with self._lock:
+            setattr(self, f"{kind}_calls", getattr(self, f"{kind}_calls") + 1)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class FakeModels:
+    def __init__(
+        self,
+        stats: _Stats,
+        embed_delay: float,
+        generate_delay: float,
+        dimension: int,
+        rate_limit_every: int = 0,
+        max_batch_size: int = 100,
+    ):
+        self._stats = stats
+        self.embed_delay = embed_delay
+        self.generate_delay = generate_delay
+        self.dimension = dimension
+        self.rate_limit_every = rate_limit_every
+        self.max_batch_size = max_batch_size
+
+    def embed_content(self, model: str, contents, config=None):
+        self._stats.enter("embed")
+        try:
+            time.sleep(self.embed_delay)
+            self._check_limits(contents)
+            return self._embed_response(contents)
+        finally:
+            self._stats.leave()
+
+    def _check_limits(self, contents):
+        """Reject oversized batches and every Nth call, like the real quota does."""
+        texts = contents if isinstance(contents, list) else [contents]
+        if len(texts) > self.max_batch_size:
+            raise errors.ClientError(
+                400, {"error": {"code": 400, "message": "Batch too large", "status": "INVALID_ARGUMENT"}}
+            )
+
+        with self._stats._lock:
+            self._stats.checked_embed_calls += 1
+            if self.rate_limit_every and self._stats.checked_embed_calls % self.rate_limit_every == 0:
+                self._stats.rate_limited += 1
+                raise rate_limit_error()
+            self._stats.embedded_texts += len(texts)
+
+    def generate_content(self, model: str, contents, config=None):
+        self._stats.enter("generate")
+        try:
+            time.sleep(self.generate_delay)
+            return SimpleNamespace(text=fake_answer(contents))
+        finally:
+            self._stats.leave()
+
+    def _embed_response(self, contents):
+        texts = contents if isinstance(contents, list) else [contents]
+        return SimpleNamespace(
+            embeddings=[SimpleNamespace(values=fake_embedding(t, self.dimension)) for t in texts]
+        )
+
+
+class FakeAsyncModels:
+    def __init__(self, models: FakeModels):
+        self._models = models
+
+    async def embed_content(self, model: str, contents, config=None):
+        self._models._stats.enter("embed")
+        try:
+            await asyncio.sleep(self._models.embed_delay)
+            self._models._check_limits(contents)
+            return self._models._embed_response(contents)
+        finally:
+            self._models._stats.leave()
+
+    async def generate_content(self, model: str, contents, config=None):
+        self._models._stats.enter("generate")
+        try:
+            await asyncio.sleep(self._models.generate_delay)
+            return SimpleNamespace(text=fake_answer(contents))
+        finally:
+            self._models._stats.leave()
+
+    async def generate_content_stream(self, model: str, contents, config=None):
+        """Mirror genai: awaiting returns an async iterator of partial responses."""
+        words = fake_answer(contents).split(" ")
+        delay = self._models.generate_delay / len(words)
+
+        async def chunks():
+            self._models._stats.enter("generate")
+            try:
+                for i, word in enumerate(words):
+                    await asyncio.sleep(delay)
+                    yield SimpleNamespace(text=word if i == 0 else f" {word}")
+            finally:
+                self._models._stats.leave()
+
+        return chunks()
+
+
+class FakeGenaiClient:
+    def __init__(
+        self,
+        embed_delay: float = 0.05,
+        generate_delay: float = 1.0,
+        dimension: int = DEFAULT_DIMENSION,
+        rate_limit_every: int = 0,
+        max_batch_size: int = 100,
+    ):
+        self.stats = _Stats()
+        self.models = FakeModels(
+            self.stats, embed_delay, generate_delay, dimension, rate_limit_every, max_batch_size
+        )
+        self.aio = SimpleNamespace(models=FakeAsyncModels(self.models))
@@ -0,0 +1,111 @@
+"""
+Latency, recall@k and hits returned for single-year filtered search as the
+partition count grows: per-partition indexes, an IDSelector over the main
+index, and post-filtering an unfiltered search.
+"""
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks._common import Table, argument_parser, configure_env, percentile
+
+configure_env()
+
+# pylint: disable=wrong-import-position
+from benchmarks.ann_index import synthetic_corpus
+from app.core.config import get_settings
+from app.rag.index_factory import INDEX_TYPES, build_index, configure_search
+from app.rag.metadata_store import MetadataStore, write_metadata
+from app.rag.partitions import FilteredSearch, RetrievalFilter, write_partitions
+
+FIRST_YEAR = 1990
+
+
+def records_for(n_partitions: int, rows: int) -> list[dict]:
+    return [
+        {
+            "row_id": row_id, "id": f"chunk-{row_id}", "section": "", "topic": "", "text": "",
+            "source": "", "document": "CRA", "jurisdiction": "Canada",
+            "year": FIRST_YEAR + row_id // rows, "chunk_hash": f"h{row_id}",
+        }
+        for row_id in range(n_partitions * rows)
+    ]
+
+
+def timed_search(search, queries, years, k: int):
+    latencies, found = [], []
+    for query, year in zip(queries, years):
+        started = time.perf_counter()
+        found.append(search(query.reshape(1, -1), k, year))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, found
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--partitions", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--rows", type=int, default=2000, help="chunks per partition")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--index-type", default="flat", choices=INDEX_TYPES)
+    args = parser.parse_args()
+
+    get_settings().INDEX_TYPE = args.index_type
+    faiss.omp_set_num_threads(1)
+    rng = np.random.default_rng(1)
+
+    print(f"{args.rows} chunks per partition, d={args.dimension}, {args.queries} queries, "
+          f"recall@{args.k}, {args.index_type} index")
+    table = Table("method", "partitions", "chunks", "p50 ms", "p99 ms", "recall", "hits", first_width=13, digits=3)
+    for n_partitions in args.partitions:
+        records = records_for(n_partitions, args.rows)
+        corpus, queries = synthetic_corpus(len(records), args.dimension, args.queries, clusters=200)
+        vectors = {r["chunk_hash"]: corpus[r["row_id"]] for r in records}
+        years = FIRST_YEAR + rng.integers(0, n_partitions, args.queries)
+        row_years = np.array([r["year"] for r in records])
+
+        with tempfile.TemporaryDirectory() as directory:
+            index_path = os.path.join(directory, "index.faiss")
+            index = build_index(corpus, np.arange(len(records), dtype="int64"))
+            configure_search(index)
+            faiss.write_index(index, index_path)
+            write_metadata(os.path.join(directory, "metadata.sqlite"), records, vectors, "synthetic")
+            metadata = MetadataStore(os.path.join(directory, "metadata.sqlite"))
+
+            selector = FilteredSearch(index, index_path, metadata)
+            write_partitions(directory, records, vectors)
+            partitioned = FilteredSearch(index, index_path, metadata)
+
+            def post_filter(query, k, year):
+                _, ids = index.search(query, k)
+                return [i for i in ids[0] if i != -1 and row_years[i] == year]
+
+            methods = {
+                "partitions": lambda q, k, year: partitioned.search(q, k, RetrievalFilter(year=int(year)))[1][0],
+                "selector": lambda q, k, year: selector.search(q, k, RetrievalFilter(year=int(year)))[1][0],
+                "post-filter": post_filter,
+            }
+
+            truth = []
+            for query, year in zip(queries, years):
+                members = np.flatnonzero(row_years == year)
+                scores = corpus[members] @ query
+                truth.append(set(members[np.argsort(-scores)[:args.k]]))
+
+            for method, search in methods.items():
+                latencies, found = timed_search(search, queries, years, args.k)
+                hits = [[i for i in f if i != -1] for f in found]
+                recall = np.mean([len(set(h) & t) / args.k for h, t in zip(hits, truth)])
+                table.row(
+                    method, n_partitions, len(records), percentile(latencies, 50), percentile(latencies, 99),
+                    float(recall), float(np.mean([len(h) for h in hits])),
+                )
+            metadata.close()
+
+
+if __name__ == "__main__":
+    main()
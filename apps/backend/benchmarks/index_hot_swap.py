@@ -0,0 +1,130 @@
+"""
+Retrieval latency and errors before, during and after a snapshot hot swap,
+with `--concurrency` retrievals in flight while ingest publishes a new
+snapshot, next to what a restarted worker pays before its first answer.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks._common import Table, argument_parser, configure_env, percentile
+
+configure_env()
+
+# pylint: disable=wrong-import-position
+import app.rag.ingest
+import app.rag.snapshots
+from benchmarks.fake_genai import FakeGenaiClient
+from app.core.setup import aget_retriever, set_resources, watch_snapshots
+from app.rag.ingest import chunk_hash, ingest, load_knowledge
+from app.rag.retriever import FaissRetriever
+from app.rag.snapshots import current_snapshot
+
+QUESTIONS = (
+    "How are TFSA withdrawals added back to contribution room?",
+    "What happens if I over-contribute to my TFSA?",
+    "Can a non-resident open a TFSA?",
+)
+
+
+def use_work_dir(work_dir: str, scale: int):
+    """Publish snapshots under `work_dir` and ingest the knowledge base `scale` times over."""
+    snapshots = app.rag.snapshots
+    snapshots.EMBEDDING_DIR = work_dir
+    snapshots.SNAPSHOTS_DIR = os.path.join(work_dir, "snapshots")
+    snapshots.MANIFEST_PATH = os.path.join(work_dir, "manifest.json")
+    snapshots.LEGACY_INDEX_PATH = os.path.join(work_dir, "missing.faiss")
+    app.rag.ingest.CHECKPOINT_PATH = os.path.join(work_dir, "ingest_checkpoint.sqlite")
+
+    base = load_knowledge()
+
+    def scaled_knowledge():
+        records = []
+        for copy in range(scale):
+            for record in base:
+                text = record["text"] if copy == 0 else f"{record['text']} (variant {copy})"
+                records.append({**record, "id": f"{record['id']}_{copy}", "text": text, "chunk_hash": chunk_hash(text)})
+        return records
+
+    app.rag.ingest.load_knowledge = scaled_knowledge
+
+
+async def run(args, client: FakeGenaiClient):
+    latencies: list[tuple[float, float, str]] = []
+    errors = 0
+    swap_window: dict[str, float] = {}
+
+    async def publish():
+        await asyncio.sleep(args.duration / 3)
+        swap_window["published"] = time.perf_counter()
+        await asyncio.to_thread(ingest, client, True)
+        swap_window["ingested"] = time.perf_counter()
+
+    async def load(deadline: float, worker: int):
+        nonlocal errors
+        i = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                retriever = await aget_retriever()
+                await retriever.aretrieve(f"{QUESTIONS[i % len(QUESTIONS)]} ({worker}-{i})")
+            except Exception: # pylint: disable=broad-exception-caught
+                errors += 1
+            latencies.append((started, time.perf_counter() - started, retriever.version))
+            i += 1
+
+    retriever = await aget_retriever()
+    first_version = retriever.version
+    watcher = asyncio.create_task(watch_snapshots(args.reload_seconds))
+    deadline = time.perf_counter() + args.duration
+    await asyncio.gather(publish(), *(load(deadline, w) for w in range(args.concurrency)))
+    watcher.cancel()
+
+    swapped_at = min((s for s, _, v in latencies if v != first_version), default=None)
+    versions = Counter(v for _, _, v in latencies)
+    print(f"requests={len(latencies)} errors={errors} served_by_version={dict(versions)}")
+    print(f"ingest took {swap_window['ingested'] - swap_window['published']:.2f}s")
+
+    phases = {
+        "before publish": [d for s, d, _ in latencies if s < swap_window["published"]],
+        "publish to swap": [d for s, d, _ in latencies if swap_window["published"] <= s < (swapped_at or deadline)],
+        "after swap": [d for s, d, _ in latencies if swapped_at and s >= swapped_at],
+    }
+    table = Table("phase", "count", "p50 ms", "p99 ms", "max ms", first_width=18, indent="  ")
+    for name, values in phases.items():
+        values = [v * 1000 for v in values]
+        table.row(name, len(values), percentile(values, 50), percentile(values, 99), max(values, default=0.0))
+
+
+def cold_start(client: FakeGenaiClient) -> float:
+    started = time.perf_counter()
+    snapshot = current_snapshot()
+    retriever = FaissRetriever(snapshot.index_path, snapshot.metadata_path, client, version=snapshot.version)
+    retriever.retrieve(QUESTIONS[0])
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--corpus-scale", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=6.0)
+    parser.add_argument("--reload-seconds", type=float, default=0.5)
+    parser.add_argument("--embed-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="hot-swap-") as work_dir:
+        use_work_dir(work_dir, args.corpus_scale)
+        client = FakeGenaiClient(embed_delay=0, generate_delay=0)
+        set_resources(client=client)
+        ingest(client, incremental=False)
+        client.models.embed_delay = args.embed_delay
+
+        asyncio.run(run(args, client))
+        print(f"restarted worker: first answer after {cold_start(client) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+`embed_texts` throughput by EMBED_CONCURRENCY with injected 429s, then how
+many chunks a run resumed from its checkpoint re-embeds.
+"""
+import os
+import tempfile
+import time
+
+from benchmarks._common import argument_parser, configure_env
+
+configure_env()
+
+# pylint: disable=wrong-import-position
+from benchmarks.fake_genai import FakeGenaiClient
+from app.core.config import get_settings
+from app.rag.embedder import EmbeddingCheckpoint, embed_texts
+
+
+def _corpus(n: int) -> dict[str, str]:
+    return {f"chunk-{i:06}": f"Synthetic CRA guidance paragraph number {i}." for i in range(n)}
+
+
+def run_throughput(texts: dict[str, str], args):
+    settings = get_settings()
+    for concurrency in args.concurrency:
+        settings.EMBED_CONCURRENCY = concurrency
+        client = FakeGenaiClient(
+            embed_delay=args.embed_delay, dimension=args.dimension, rate_limit_every=args.rate_limit_every
+        )
+
+        started = time.perf_counter()
+        vectors = embed_texts(texts, client)
+        elapsed = time.perf_counter() - started
+
+        assert len(vectors) == len(texts)
+        print(
+            f"concurrency={concurrency:<3} chunks={len(vectors):<6} time={elapsed:6.2f}s "
+            f"throughput={len(vectors) / elapsed:8.1f} chunks/s "
+            f"calls={client.stats.embed_calls} retried_429={client.stats.rate_limited}"
+        )
+
+
+def run_resume(texts: dict[str, str], args):
+    settings = get_settings()
+    model = settings.GEMINI_EMBEDDING_MODEL
+    path = os.path.join(tempfile.mkdtemp(), "ingest_checkpoint.sqlite")
+
+    # Every call after the first half fails with a non-retryable error
+    batches = -(-len(texts) // settings.EMBED_BATCH_SIZE)
+    client = FakeGenaiClient(embed_delay=args.embed_delay, dimension=args.dimension)
+    client.models.max_batch_size = settings.EMBED_BATCH_SIZE
+    settings.EMBED_CONCURRENCY = 1
+    original = client.models.embed_content
+
+    def flaky(model, contents, config=None):
+        if client.stats.embed_calls >= batches // 2:
+            raise KeyboardInterrupt("simulated interruption")
+        return original(model, contents, config)
+
+    client.models.embed_content = flaky
+    try:
+        embed_texts(texts, client, checkpoint=EmbeddingCheckpoint(path, model))
+    except KeyboardInterrupt:
+        pass
+
+    checkpoint = EmbeddingCheckpoint(path, model)
+    done = checkpoint.load()
+    remaining = {k: v for k, v in texts.items() if k not in done}
+
+    client = FakeGenaiClient(embed_delay=args.embed_delay, dimension=args.dimension)
+    embed_texts(remaining, client, checkpoint=checkpoint)
+    print(
+        f"resume: interrupted after {len(done)} chunks, second run embedded "
+        f"{client.stats.embedded_texts} of {len(texts)}"
+    )
+    checkpoint.delete()
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--embed-delay", type=float, default=0.1)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--rate-limit-every", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    get_settings().EMBED_BACKOFF_SECONDS = 0.05
+    texts = _corpus(args.chunks)
+    run_throughput(texts, args)
+    run_resume(texts, args)
+
+
+if __name__ == "__main__":
+    main()
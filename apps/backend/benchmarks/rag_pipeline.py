@@ -0,0 +1,231 @@
+"""
+Throughput, per-stage p50/p95/p99 (the timers behind /metrics) and memory for
+`retrieve` + `ask_llm` called directly, then for POST /chat/{id}/message with
+`--concurrency` requests in flight. Set DB_URL to use Postgres instead of a
+temp SQLite file.
+"""
+import asyncio
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks._common import Table, argument_parser, configure_env, percentile
+
+WORK_DIR = tempfile.mkdtemp(prefix="rag-benchmark-")
+os.environ.setdefault("DB_URL", f"sqlite:///{WORK_DIR}/benchmark.db")
+os.environ["TIMING_HEADER_ENABLED"] = "true"
+configure_env()
+
+# pylint: disable=wrong-import-position
+import faiss
+import httpx
+
+from benchmarks.fake_genai import FakeGenaiClient
+from app.core.auth import get_auth0
+from app.core.config import get_settings
+from app.core.metrics import collect_timings
+from app.core.setup import get_client, set_resources
+from app.llm.coalesce import CoalescingClient
+from app.main import app as fastapi_app
+from app.rag.embedder import embed_texts
+from app.rag.index_factory import build_index, index_kind
+from app.rag.ingest import chunk_hash, load_knowledge
+from app.rag.metadata_store import write_metadata
+from app.rag.ask import ask_llm
+from app.rag.retriever import FaissRetriever
+
+QUESTION_TEMPLATES = (
+    "What happens if I over-contribute to my TFSA ({run} #{i})?",
+    "How are TFSA withdrawals added back to contribution room ({run} #{i})?",
+    "Can a non-resident open a TFSA ({run} #{i})?",
+    "What is the contribution room if I turned 18 in 2015 ({run} #{i})?",
+    "When do I need form RC343 ({run} #{i})?",
+)
+
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def questions(n: int, run: str) -> list[str]:
+    # Distinct questions so the embedding and answer caches do not hide the work
+    return [QUESTION_TEMPLATES[i % len(QUESTION_TEMPLATES)].format(run=run, i=i) for i in range(n)]
+
+
+def build_corpus(scale: int, client: FakeGenaiClient) -> FaissRetriever:
+    """Index app/knowledge, repeated `scale` times, into WORK_DIR with stub embeddings."""
+    base = load_knowledge()
+    records = []
+    for copy in range(scale):
+        for record in base:
+            text = record["text"] if copy == 0 else f"{record['text']} (variant {copy})"
+            records.append({
+                **record,
+                "id": f"{record['id']}_{copy}",
+                "text": text,
+                "chunk_hash": chunk_hash(text),
+                "row_id": len(records),
+            })
+
+    vectors = embed_texts({r["chunk_hash"]: r["text"] for r in records}, client)
+    index = build_index(
+        np.stack([vectors[r["chunk_hash"]] for r in records]),
+        np.array([r["row_id"] for r in records], dtype="int64"),
+    )
+
+    index_path = os.path.join(WORK_DIR, "index.faiss")
+    metadata_path = os.path.join(WORK_DIR, "metadata.sqlite")
+    faiss.write_index(index, index_path)
+    write_metadata(metadata_path, records, vectors, get_settings().GEMINI_EMBEDDING_MODEL)
+
+    print(
+        f"corpus chunks={len(records)} index={index_kind(index)} "
+        f"index_size={os.path.getsize(index_path) / 2 ** 20:.1f}MB "
+        f"metadata_size={os.path.getsize(metadata_path) / 2 ** 20:.1f}MB"
+    )
+    return FaissRetriever(index_path=index_path, metadata_path=metadata_path, client=client)
+
+
+def install(retriever: FaissRetriever, client: FakeGenaiClient):
+    """Serve the benchmark's retriever and client in place of the app's, wrapped as `get_client` wraps it."""
+    serving = CoalescingClient(client) if get_settings().LLM_COALESCING_ENABLED else client
+    retriever.client = serving
+    set_resources(client=serving, retriever=retriever)
+
+
+def run_pipeline(n: int, retriever: FaissRetriever, model: str):
+    samples: list[dict[str, float]] = []
+    errors = 0
+
+    started = time.perf_counter()
+    for question in questions(n, "pipeline"):
+        request_started = time.perf_counter()
+        with collect_timings() as timings:
+            try:
+                ask_llm(retriever.retrieve(question), question, get_client(), model)
+            except Exception: # pylint: disable=broad-exception-caught
+                errors += 1
+                continue
+        timings["total"] = time.perf_counter() - request_started
+        samples.append(timings)
+
+    return samples, time.perf_counter() - started, errors
+
+
+def _parse_server_timing(header: str) -> dict[str, float]:
+    timings = {}
+    for entry in filter(None, (part.strip() for part in header.split(","))):
+        name, _, duration = entry.partition(";dur=")
+        timings[name] = float(duration) / 1000
+    return timings
+
+
+def stub_auth():
+    """Accept any bearer token; the app's own auth dependencies still run."""
+    async def verify_request(**_):
+        return {"sub": "benchmark|user"}
+
+    get_auth0().api_client.verify_request = verify_request
+
+
+def benchmark_client(**headers) -> httpx.AsyncClient:
+    """HTTP client calling the FastAPI app in-process."""
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=fastapi_app, raise_app_exceptions=False),
+        base_url="http://benchmark",
+        timeout=None,
+        headers={"Authorization": "Bearer benchmark", **headers},
+    )
+
+
+async def run_endpoints(n: int, concurrency: int):
+    stub_auth()
+
+    samples: list[dict[str, float]] = []
+    errors = 0
+
+    async with fastapi_app.router.lifespan_context(fastapi_app):
+        async with benchmark_client(**{"X-Debug-Timing": "1"}) as http:
+            chat_ids = []
+            for i in range(concurrency):
+                response = await http.post("/chat/create", params={"chat_title": f"benchmark {i}"})
+                chat_ids.append(response.json()["chat"]["id"])
+
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def send(i: int, question: str):
+                nonlocal errors
+                async with semaphore:
+                    request_started = time.perf_counter()
+                    response = await http.post(
+                        f"/chat/{chat_ids[i % concurrency]}/message", params={"question": question}
+                    )
+                    elapsed = time.perf_counter() - request_started
+
+                if response.status_code != 200 or response.json().get("code") != 200:
+                    errors += 1
+                    return
+                timings = _parse_server_timing(response.headers.get("server-timing", ""))
+                timings["total"] = elapsed
+                samples.append(timings)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(send(i, q) for i, q in enumerate(questions(n, "endpoints"))))
+            elapsed = time.perf_counter() - started
+
+    return samples, elapsed, errors
+
+
+def report(name: str, samples: list[dict[str, float]], elapsed: float, errors: int):
+    print(
+        f"\n{name}: requests={len(samples) + errors} errors={errors} wall={elapsed:.2f}s "
+        f"throughput={len(samples) / elapsed if elapsed else 0:.1f} req/s rss={rss_mb():.0f}MB"
+    )
+    stages = sorted({stage for timings in samples for stage in timings}, key=lambda s: (s == "total", s))
+    table = Table("stage", "count", "p50 ms", "p95 ms", "p99 ms", first_width=22, indent="  ")
+    for stage in stages:
+        values = [timings[stage] * 1000 for timings in samples if stage in timings]
+        table.row(stage, len(values), *(percentile(values, pct) for pct in (50, 95, 99)))
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--corpus-scale", type=int, default=1, help="copies of the knowledge base to index")
+    parser.add_argument("--embed-delay", type=float, default=0.05)
+    parser.add_argument("--generate-delay", type=float, default=0.5)
+    parser.add_argument("--skip-endpoints", action="store_true")
+    args = parser.parse_args()
+
+    print(f"work_dir={WORK_DIR} db={get_settings().DB_URL} rss_start={rss_mb():.0f}MB")
+
+    client = FakeGenaiClient(embed_delay=0, generate_delay=args.generate_delay)
+    retriever = build_corpus(args.corpus_scale, client)
+    client.models.embed_delay = args.embed_delay
+    install(retriever, client)
+    print(f"rss_after_index_load={rss_mb():.0f}MB")
+
+    report("pipeline", *run_pipeline(args.requests, retriever, get_settings().GEMINI_GENAI_MODEL))
+
+    if not args.skip_endpoints:
+        report("endpoints", *asyncio.run(run_endpoints(args.requests, args.concurrency)))
+
+    print(f"\npeak_rss={peak_rss_mb():.0f}MB upstream_calls embed={client.stats.embed_calls} "
+          f"generate={client.stats.generate_calls}")
+
+
+if __name__ == "__main__":
+    main()
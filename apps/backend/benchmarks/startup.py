@@ -0,0 +1,45 @@
+"""
+Time from process start to app imported, to the first GET / answer, and to
+GET /ready returning 200 once the index has loaded in the background.
+"""
+import asyncio
+import tempfile
+import time
+
+started = time.perf_counter()
+
+# pylint: disable=wrong-import-position
+import os
+
+from benchmarks._common import configure_env
+
+os.environ.setdefault("DB_URL", f"sqlite:///{tempfile.mkdtemp(prefix='startup-benchmark-')}/startup.db")
+configure_env()
+
+import httpx
+
+from app.main import app as fastapi_app
+
+imported = time.perf_counter()
+
+
+async def run():
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with fastapi_app.router.lifespan_context(fastapi_app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as http:
+            (await http.get("/")).raise_for_status()
+            serving = time.perf_counter()
+
+            polls = 0
+            while (await http.get("/ready")).status_code != 200:
+                polls += 1
+                await asyncio.sleep(0.01)
+            ready = time.perf_counter()
+
+    print(f"import={imported - started:.2f}s")
+    print(f"first_health_check={serving - started:.2f}s")
+    print(f"ready={ready - started:.2f}s (503 from /ready {polls} times while the index loaded)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
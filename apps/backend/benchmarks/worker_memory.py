@@ -0,0 +1,121 @@
+"""
+RSS, PSS and USS per spawned worker, with and without INDEX_MMAP, once each
+worker has searched its index. Total PSS is what the machine really uses.
+"""
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks._common import Table, argument_parser, configure_env
+
+configure_env()
+
+# pylint: disable=wrong-import-position
+import faiss
+
+from benchmarks.ann_index import synthetic_corpus
+from app.rag.index_factory import INDEX_TYPES, build_index
+from app.rag.ingest import chunk_hash
+from app.rag.metadata_store import write_metadata
+
+
+def memory_mb() -> dict[str, float]:
+    """RSS, PSS and USS of this process from /proc/self/smaps_rollup."""
+    fields = {}
+    with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0]) / 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def build_store(work_dir: str, n: int, dimension: int, index_type: str) -> tuple[str, str]:
+    vectors, _ = synthetic_corpus(n, dimension, queries=0, clusters=200)
+    index_path = os.path.join(work_dir, "index.faiss")
+    metadata_path = os.path.join(work_dir, "metadata.sqlite")
+
+    faiss.write_index(build_index(vectors, np.arange(n, dtype="int64"), index_type), index_path)
+    records = []
+    for i in range(n):
+        text = f"Synthetic TFSA chunk {i} about contribution room, withdrawals and transfers."
+        records.append({
+            "row_id": i, "id": f"chunk_{i}", "section": f"Section {i}", "topic": "synthetic", "text": text,
+            "source": "benchmark", "document": "CRA", "jurisdiction": "Canada", "year": 2025,
+            "chunk_hash": chunk_hash(text),
+        })
+    write_metadata(metadata_path, records, {}, "stub-embedding")
+
+    print(
+        f"index={index_type} vectors={n} dimension={dimension} "
+        f"index_size={os.path.getsize(index_path) / 2 ** 20:.1f}MB "
+        f"metadata_size={os.path.getsize(metadata_path) / 2 ** 20:.1f}MB"
+    )
+    return index_path, metadata_path
+
+
+def worker(index_path, metadata_path, dimension, mmap, loaded, measured, results):
+    os.environ["INDEX_MMAP"] = str(mmap).lower()
+    from app.rag.retriever import FaissRetriever # pylint: disable=import-outside-toplevel
+
+    retriever = FaissRetriever(index_path=index_path, metadata_path=metadata_path, client=None)
+    queries = np.random.default_rng(os.getpid()).standard_normal((50, dimension)).astype("float32")
+    faiss.normalize_L2(queries)
+    for query in queries:
+        retriever.search_by_vector(query.reshape(1, -1), 5)
+
+    loaded.wait()
+    results.put(memory_mb())
+    # Stay alive until every worker has measured, so shared pages stay shared
+    measured.wait()
+
+
+def measure(args, index_path, metadata_path, workers: int, mmap: bool) -> list[dict[str, float]]:
+    context = multiprocessing.get_context("spawn")
+    loaded, measured = context.Barrier(workers), context.Barrier(workers + 1)
+    results = context.Queue()
+
+    processes = [
+        context.Process(
+            target=worker, args=(index_path, metadata_path, args.dimension, mmap, loaded, measured, results)
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    samples = [results.get() for _ in range(workers)]
+    measured.wait()
+    for process in processes:
+        process.join()
+    return samples
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--vectors", type=int, default=30000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--index-type", default="flat", choices=INDEX_TYPES)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="worker-memory-") as work_dir:
+        index_path, metadata_path = build_store(work_dir, args.vectors, args.dimension, args.index_type)
+
+        table = Table("mmap", "workers", "rss/worker MB", "pss/worker MB", "uss/worker MB", "total pss MB",
+                      first_width=6, digits=0)
+        for mmap in (False, True):
+            for workers in args.workers:
+                samples = measure(args, index_path, metadata_path, workers, mmap)
+                mean = {k: sum(s[k] for s in samples) / workers for k in ("rss", "pss", "uss")}
+                table.row(str(mmap).lower(), workers, mean["rss"], mean["pss"], mean["uss"], mean["pss"] * workers)
+
+
+if __name__ == "__main__":
+    main()
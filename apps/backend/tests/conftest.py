@@ -0,0 +1,11 @@
+import os
+
+# Settings the app requires at import time; tests never reach these services
+for key, value in {
+    "GEMINI_GENAI_MODEL": "test-llm",
+    "GEMINI_EMBEDDING_MODEL": "test-embedding",
+    "DB_URL": "sqlite:///./test.db",
+    "AUTH0_DOMAIN": "test.invalid",
+    "AUTH0_AUDIENCE": "test",
+}.items():
+    os.environ.setdefault(key, value)
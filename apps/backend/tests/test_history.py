@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import get_settings
+from app.rag.history import fit_history, is_follow_up
+from app.rag.prompt import estimate_tokens
+
+# A typical answer: several paragraphs citing CRA sections, about 2,000 characters
+ANSWER = " ".join(
+    ["If you contribute more than your available TFSA contribution room, the CRA charges a tax of 1% per month "
+     "on the highest excess amount in that month, for as long as it stays in your account."] * 11
+)
+
+
+def message(sent_by: str, text: str):
+    return SimpleNamespace(sent_by=sent_by, text=text)
+
+
+def exchange(question: str, answer: str = ANSWER):
+    return [message("user", question), message("system", answer)]
+
+
+def test_long_latest_answer_is_kept_not_folded():
+    assert len(ANSWER) >= 2000
+    messages = exchange("What happens if I over-contribute?")
+
+    history = fit_history("", messages)
+
+    assert history.folded == []
+    assert history.text.startswith("User: What happens if I over-contribute?\nAssistant: If you contribute")
+    settings = get_settings()
+    assert estimate_tokens(history.text) <= settings.HISTORY_TOKEN_BUDGET - settings.HISTORY_SUMMARY_TOKENS
+
+
+def test_only_older_turns_are_folded():
+    messages = exchange("What is a TFSA?") + exchange("What happens if I over-contribute?")
+
+    history = fit_history("", messages)
+
+    assert history.folded == messages[:2]
+    assert "User asked: What is a TFSA?" in history.summary
+    assert "User: What happens if I over-contribute?" in history.text
+    assert "User: What is a TFSA?" not in history.text
+
+
+def test_short_history_is_kept_verbatim():
+    messages = exchange("What is a TFSA?", "A tax-free savings account.") + exchange("Who can open one?", "Residents 18+.")
+
+    history = fit_history("", messages)
+
+    assert history.folded == []
+    assert history.text == (
+        "User: What is a TFSA?\nAssistant: A tax-free savings account.\n"
+        "User: Who can open one?\nAssistant: Residents 18+."
+    )
+
+
+@pytest.mark.parametrize(
+    "question, follow_up",
+    [
+        ("What is a TFSA?", False),
+        ("Can I transfer my TFSA to another bank?", False),
+        ("What happens if I over-contribute to my TFSA?", False),
+        ("And for 2024?", True),
+        ("What about RRSPs?", True),
+        ("Is that taxed?", True),
+    ],
+)
+def test_is_follow_up(question, follow_up):
+    assert is_follow_up(question) is follow_up
@@ -0,0 +1,63 @@
+import pytest
+
+from app.agents.router import Route, route_question
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("I turned 18 in 2015, how much contribution room do I have?", Route("calculation", 2015, True)),
+        ("How much can I contribute? I turned eighteen in 2010", Route("calculation", 2010, True)),
+        ("I was born in 1995. What is my TFSA contribution room?", Route("calculation", 2013, True)),
+        ("Calculate my TFSA room, I became 18 in 2020", Route("calculation", 2020, True)),
+    ],
+)
+def test_confident_only_when_the_year_turned_18_is_stated(question, expected):
+    assert route_question(question) == expected
+
+
+@pytest.mark.parametrize(
+    "question, year",
+    [
+        # Past contributions and withdrawals change the room; the template ignores them
+        ("I turned 18 in 2015 and contributed $20,000 in 2020, how much room do I have left?", 2015),
+        ("How much room do I have if I turned 18 in 2012 and withdrew 5000 dollars?", 2012),
+        ("I was born in 1990 and deposited $7k last year, what is my contribution room?", 2008),
+    ],
+)
+def test_not_confident_with_a_contribution_history(question, year):
+    assert route_question(question) == Route("calculation", year, False)
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        # A bare year is not the year the person turned 18
+        "How much can I contribute to my TFSA in 2025?",
+        "How much contribution room do I have? I opened my TFSA in 2015",
+    ],
+)
+def test_bare_years_go_to_search(question):
+    assert route_question(question) == Route("search")
+
+
+def test_calculation_without_a_year():
+    assert route_question("How much contribution room do I have?") == Route("calculation", None, False)
+
+
+def test_explanation_with_a_stated_year_is_not_confident():
+    route = route_question("I turned 18 in 2015. Why is my contribution room different from my friend's?")
+    assert route == Route("calculation", 2015, False)
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "What is a TFSA?",
+        "How are withdrawals added back to contribution room?",
+        "What happens if I over-contribute to my TFSA?",
+        "Can a non-resident open a TFSA?",
+    ],
+)
+def test_rule_questions_go_to_search(question):
+    assert route_question(question) == Route("search")
@@ -6,6 +6,13 @@ export type Message = {
   sent_by: 'user' | 'system';
 };
 
+export type MessagePage = {
+  messages: Message[];
+  has_more: boolean;
+  before_cursor: string | null;
+  after_cursor: string | null;
+};
+
 export type Chat = {
   id: string;
   chat_title: string;
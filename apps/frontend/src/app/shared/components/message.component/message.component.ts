@@ -3,19 +3,24 @@ import { ZardCardComponent } from '../card/card.component';
 import { MarkdownComponent } from 'ngx-markdown';
 import { ZardSkeletonComponent } from '../skeleton/skeleton.component';
 import { MessageService } from '@/shared/services/message.service';
-import { Message } from '@/models/chat';
+import { Message, MessagePage } from '@/models/chat';
 import { DatePipe } from '@angular/common';
+import { ZardButtonComponent } from '../button/button.component';
 
 @Component({
   selector: 'app-message',
-  imports: [ZardCardComponent, ZardSkeletonComponent, MarkdownComponent, DatePipe],
+  imports: [ZardCardComponent, ZardSkeletonComponent, MarkdownComponent, DatePipe, ZardButtonComponent],
   templateUrl: './message.component.html',
 })
 export class MessageComponent implements OnInit, OnChanges {
   @Input() chat_id: string = '';
   messageService = inject(MessageService);
   loading = signal(false);
+  loadingOlder = signal(false);
   messages = signal<Message[]>([]);
+  hasOlder = signal(false);
+  private beforeCursor: string | null = null;
+  private afterCursor: string | null = null;
 
   ngOnInit() {
     this.fetchMessages();
@@ -27,12 +32,42 @@ export class MessageComponent implements OnInit, OnChanges {
     }
   }
 
+  // Silent refreshes (after sending a message) only fetch what is newer than the last message shown,
+  // so older pages the user loaded stay in place
   fetchMessages(silent = false) {
     if (!this.chat_id) return;
+    if (silent && this.afterCursor) {
+      this.fetchNewer(this.chat_id, this.afterCursor);
+      return;
+    }
+
     if (!silent) this.loading.set(true);
-    this.messageService.getMessages(this.chat_id).subscribe((data: any) => {
-      this.messages.set(data.messages);
+    this.messageService.getMessages(this.chat_id).subscribe((page: MessagePage) => {
+      this.messages.set(page.messages);
+      this.hasOlder.set(page.has_more);
+      this.beforeCursor = page.before_cursor;
+      this.afterCursor = page.after_cursor;
       this.loading.set(false);
     });
   }
+
+  loadOlder() {
+    if (!this.chat_id || !this.beforeCursor || this.loadingOlder()) return;
+    this.loadingOlder.set(true);
+    this.messageService.getMessages(this.chat_id, { before: this.beforeCursor }).subscribe((page: MessagePage) => {
+      this.messages.update((messages) => [...page.messages, ...messages]);
+      this.hasOlder.set(page.has_more);
+      this.beforeCursor = page.before_cursor;
+      this.loadingOlder.set(false);
+    });
+  }
+
+  private fetchNewer(chat_id: string, after: string) {
+    this.messageService.getMessages(chat_id, { after }).subscribe((page: MessagePage) => {
+      if (chat_id !== this.chat_id) return;
+      this.messages.update((messages) => [...messages, ...page.messages]);
+      this.afterCursor = page.after_cursor;
+      if (page.has_more && page.after_cursor) this.fetchNewer(chat_id, page.after_cursor);
+    });
+  }
 }
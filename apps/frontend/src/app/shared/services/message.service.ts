@@ -1,4 +1,4 @@
-import { Message } from '@/models/chat';
+import { MessagePage } from '@/models/chat';
 import { HttpClient } from '@angular/common/http';
 import { Injectable } from '@angular/core';
 import { Observable } from 'rxjs/internal/Observable';
@@ -12,8 +12,12 @@ export class MessageService {
 
   constructor(private http: HttpClient) { }
 
-  public getMessages(chat_id: string) : Observable<Message[]>{
-    return this.http.get<Message[]>(`${this.API_URL}${chat_id}/messages`);
+  // The latest page by default; `before` loads older messages, `after` newer ones
+  public getMessages(chat_id: string, cursor: { before?: string; after?: string } = {}) : Observable<MessagePage>{
+    const params: Record<string, string> = {};
+    if (cursor.before) params['before'] = cursor.before;
+    if (cursor.after) params['after'] = cursor.after;
+    return this.http.get<MessagePage>(`${this.API_URL}${chat_id}/messages`, { params });
   }
 
   //   public sendMessage(message: string) {